@@ -39,7 +39,10 @@ USAGE:
     print(colunas['Nome'])  # ['Item 1', 'Item 2']
 
 DEPENDENCIES:
-    - codecs, os, csv
+    - codecs, io, os, re, csv
+    - Snippets.data._file_utils (replace_file)
+    - pyarrow (opcional, CPython) - leitura multi-thread em ler_csv_por_colunas
+    - numpy (opcional, CPython) - ler_csv_por_colunas(formato='numpy')
 
 AUTHOR: Thiago Barreto
 VERSION: 2.0 (Extendido em ITERATION 2 - 29/11/2025)
@@ -55,10 +58,114 @@ CHANGELOG:
 """
 
 import codecs
+import io
 import os
+import re
 import csv
 from datetime import datetime
 
+from Snippets.data._file_utils import replace_file
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import numpy  # noqa: F401 - usado por pyarrow em to_numpy()
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# Buffer de escrita (1 MB) - menos flushes em CSVs grandes
+_BUFFER_ESCRITA = 1 << 20
+
+# Bloco por thread do leitor pyarrow (4 MB)
+_BLOCO_LEITURA_PYARROW = 4 << 20
+
+# Fatores de conversão para milímetros (unidade interna Revit)
+FATORES_CONVERSAO = {
+    'metros': 1000.0,
+    'centimetros': 10.0,
+    'milimetros': 1.0,
+    'pes': 304.8,  # 1 pé = 304.8 mm
+    'polegadas': 25.4,  # 1 polegada = 25.4 mm
+}
+
+# Cache unidade (como recebida) → fator, evita .lower() + lookup repetidos
+_CACHE_FATORES = {}
+
+# Caracteres (além da vírgula) que obrigam o uso de aspas num valor
+_ASPAS_OU_QUEBRA = re.compile(u'["\r\n]')
+
+
+def _ler_texto_utf8(caminho_arquivo):
+    """
+    Lê o arquivo inteiro numa única leitura binária e decodifica de uma vez.
+
+    'utf-8-sig' remove o BOM quando existir (arquivos do Excel /
+    escrever_csv_utf8) e é idêntico a 'utf-8' nos demais.
+    """
+    with io.open(caminho_arquivo, 'rb') as f:
+        return f.read().decode('utf-8-sig')
+
+
+def _dividir_linha_csv(linha):
+    """
+    Divide linha CSV (já sem espaços nas pontas) em valores sem aspas.
+
+    Inverso de _formatar_linha_csv: vírgulas dentro de aspas não separam
+    valores e aspas duplicadas ("") voltam a ser uma aspa.
+    """
+    if '"' not in linha:
+        return [v.strip().strip("'") for v in linha.split(',')]
+
+    campos = []
+    inicio = 0
+    entre_aspas = False
+    for i, c in enumerate(linha):
+        if c == '"':
+            # "" dentro de aspas alterna duas vezes → estado preservado
+            entre_aspas = not entre_aspas
+        elif c == ',' and not entre_aspas:
+            campos.append(linha[inicio:i])
+            inicio = i + 1
+    campos.append(linha[inicio:])
+
+    valores = []
+    for campo in campos:
+        campo = campo.strip()
+        if len(campo) >= 2 and campo[0] == '"' and campo[-1] == '"':
+            valores.append(campo[1:-1].replace('""', '"'))
+        else:
+            valores.append(campo.strip('"').strip("'"))
+    return valores
+
+
+def _formatar_linha_csv(valores):
+    """
+    Formata valores como linha CSV e retorna a linha codificada em UTF-8.
+
+    Linhas sem vírgula, aspas ou quebra de linha nos valores (caso comum,
+    ex: coordenadas) são escritas sem aspas; nas demais, e nas que ficariam
+    em branco, todos os valores vão entre aspas, com aspas internas
+    duplicadas.
+    """
+    textos = [u'{}'.format(v) for v in valores]
+    linha = u','.join(textos)
+
+    # Só os separadores como vírgula → nenhum valor contém vírgula.
+    # Linha vazia/só espaços também vai entre aspas: leitores pulam linhas
+    # em branco e a linha se perderia
+    if (linha.count(u',') != len(textos) - 1 or _ASPAS_OU_QUEBRA.search(linha)
+            or not linha.strip()):
+        linha = u','.join([u'"' + t.replace(u'"', u'""') + u'"' for t in textos])
+
+    return (linha + u'\n').encode('utf-8')
+
 
 def exportar_csv_coordenadas(dados_lista, nome_vista, timestamp=None, pasta_destino=None):
     """
@@ -96,22 +203,24 @@ def exportar_csv_coordenadas(dados_lista, nome_vista, timestamp=None, pasta_dest
 
     # Escrever CSV com UTF-8
     try:
-        with codecs.open(caminho_completo, 'w', encoding='utf-8') as f:
+        with io.open(caminho_completo, 'w', encoding='utf-8', newline='',
+                     buffering=_BUFFER_ESCRITA) as f:
             # Cabeçalho (ordem: Marca, Comentario, Stage, Coord_X/Y/Z, Coord_DataGeracao)
             f.write("Marca,Comentario,Stage,Coord_X,Coord_Y,Coord_Z,Coord_DataGeracao\n")
 
+            # Formatar com 8 casas decimais (precisão milimétrica)
+            # Template e write ligados uma única vez, fora do loop
+            formatar_linha = "{},{},{},{:.8f},{:.8f},{:.8f},{}\n".format
+            write = f.write
+
             # Dados
             for dado in dados_lista:
-                mark = dado.get('mark', '')
-                comentario = dado.get('comentario', '')
-                stage = dado.get('stage', '')
-                x = dado.get('x', 0.0)
-                y = dado.get('y', 0.0)
-                z = dado.get('z', 0.0)
-                data = dado.get('data', '')
-
-                # Formatar com 8 casas decimais (precisão milimétrica)
-                f.write("{},{},{},{:.8f},{:.8f},{:.8f},{}\n".format(mark, comentario, stage, x, y, z, data))
+                get = dado.get
+                write(formatar_linha(
+                    get('mark', ''), get('comentario', ''), get('stage', ''),
+                    get('x', 0.0), get('y', 0.0), get('z', 0.0),
+                    get('data', '')
+                ))
 
         print("CSV exportado: {}".format(caminho_completo))
         return caminho_completo
@@ -153,7 +262,8 @@ def exportar_csv_generico(dados_lista, colunas, nome_arquivo, pasta_destino=None
 
     # Escrever CSV
     try:
-        with codecs.open(caminho_completo, 'w', encoding='utf-8') as f:
+        with io.open(caminho_completo, 'w', encoding='utf-8', newline='',
+                     buffering=_BUFFER_ESCRITA) as f:
             # Cabeçalho
             f.write(",".join(colunas) + "\n")
 
@@ -199,12 +309,10 @@ def ler_csv_utf8(caminho_arquivo, tem_cabecalho=True, retornar_tupla=False):
         if retornar_tupla:
             # Modo compatibilidade: retornar (headers, rows)
             linhas = []
-            with codecs.open(caminho_arquivo, 'r', encoding='utf-8-sig') as f:
-                for linha in f:
-                    linha = linha.strip()
-                    if linha:
-                        valores = [v.strip().strip('"').strip("'") for v in linha.split(',')]
-                        linhas.append(valores)
+            for linha in _ler_texto_utf8(caminho_arquivo).splitlines():
+                linha = linha.strip()
+                if linha:
+                    linhas.append(_dividir_linha_csv(linha))
 
             if not linhas:
                 return [], []
@@ -214,19 +322,14 @@ def ler_csv_utf8(caminho_arquivo, tem_cabecalho=True, retornar_tupla=False):
 
         else:
             # Modo padrão: retornar lista de dicionários
-            linhas = []
+            f = io.StringIO(_ler_texto_utf8(caminho_arquivo))
 
-            with codecs.open(caminho_arquivo, 'r', encoding='utf-8') as f:
-                if tem_cabecalho:
-                    # Usar DictReader para mapear automaticamente
-                    leitor = csv.DictReader(f)
-                    for row in leitor:
-                        linhas.append(dict(row))
-                else:
-                    # Ler como lista de valores
-                    leitor = csv.reader(f)
-                    for row in leitor:
-                        linhas.append(row)
+            if tem_cabecalho:
+                # DictReader já cria um dict novo por linha
+                linhas = list(csv.DictReader(f))
+            else:
+                # Ler como lista de valores
+                linhas = list(csv.reader(f))
 
             # CSV lido silenciosamente
             return linhas
@@ -304,15 +407,10 @@ def converter_para_milimetros(dados_lista, unidade_origem='metros'):
         >>> dados_mm = converter_para_milimetros(dados, 'metros')
         >>> print(dados_mm[0]['x'])  # 1500.0 mm
     """
-    FATORES_CONVERSAO = {
-        'metros': 1000.0,
-        'centimetros': 10.0,
-        'milimetros': 1.0,
-        'pes': 304.8,  # 1 pé = 304.8 mm
-        'polegadas': 25.4,  # 1 polegada = 25.4 mm
-    }
-
-    fator = FATORES_CONVERSAO.get(unidade_origem.lower(), 1.0)
+    fator = _CACHE_FATORES.get(unidade_origem)
+    if fator is None:
+        fator = FATORES_CONVERSAO.get(unidade_origem.lower(), 1.0)
+        _CACHE_FATORES[unidade_origem] = fator
 
     for dado in dados_lista:
         if 'x' in dado:
@@ -348,14 +446,20 @@ def escrever_csv_utf8(caminho_arquivo, headers, rows):
 
     Notes:
         - Usa encoding='utf-8-sig' para compatibilidade com Excel
-        - Adiciona aspas duplas em todos os valores
+        - Aspas duplas apenas em linhas com vírgula, aspas ou quebra de
+          linha nos valores, ou que ficariam em branco (aspas internas são
+          duplicadas)
         - Preenche colunas vazias automaticamente
         - Compatível com formato usado por ParameterPalette
     """
     try:
-        with codecs.open(caminho_arquivo, 'w', encoding='utf-8-sig') as f:
+        # Modo binário: BOM escrito manualmente e cada linha codificada
+        # de uma vez (evita o StreamWriter do codecs a cada write)
+        with io.open(caminho_arquivo, 'wb', buffering=_BUFFER_ESCRITA) as f:
+            f.write(codecs.BOM_UTF8)
+
             # Escrever cabeçalho
-            f.write(u','.join([u'"{}"'.format(h) for h in headers]) + u'\n')
+            f.write(_formatar_linha_csv(headers))
 
             # Escrever linhas de dados
             for row in rows:
@@ -364,7 +468,7 @@ def escrever_csv_utf8(caminho_arquivo, headers, rows):
                 while len(row_copy) < len(headers):
                     row_copy.append(u'')
 
-                f.write(u','.join([u'"{}"'.format(v) for v in row_copy]) + u'\n')
+                f.write(_formatar_linha_csv(row_copy))
 
         print("CSV escrito: {} linhas (headers + {} dados) em {}".format(len(rows) + 1, len(rows), caminho_arquivo))
         return True
@@ -374,15 +478,19 @@ def escrever_csv_utf8(caminho_arquivo, headers, rows):
         return False
 
 
-def ler_csv_por_colunas(caminho_arquivo):
+def ler_csv_por_colunas(caminho_arquivo, formato='lista'):
     """
     Lê CSV e retorna dicionário com dados organizados por coluna.
 
     Args:
         caminho_arquivo (str): Caminho do arquivo CSV
+        formato (str): Tipo de cada coluna no retorno:
+                       'lista' - list de str (padrão, funciona no IronPython)
+                       'numpy' - numpy.ndarray com tipos inferidos (float64...)
+                       'arrow' - pyarrow.ChunkedArray com tipos inferidos
 
     Returns:
-        dict: Dicionário onde chave = nome da coluna, valor = lista de valores
+        dict: Dicionário onde chave = nome da coluna, valor = coluna no formato pedido
 
     Example:
         >>> colunas = ler_csv_por_colunas("dados.csv")
@@ -390,28 +498,47 @@ def ler_csv_por_colunas(caminho_arquivo):
         >>> print(colunas['Nome'])  # ['Parede 1', 'Parede 2', 'Parede 3']
         >>> print(len(colunas['Valor']))  # 3
 
+        >>> # CPython com numpy/pyarrow: colunas numéricas já como float64
+        >>> colunas = ler_csv_por_colunas("coordenadas.csv", formato='numpy')
+        >>> print(colunas['Coord_X'].mean())
+
     Notes:
         - Útil para análise estatística ou busca em coluna específica
         - Primeira linha deve ser cabeçalho
+        - Com pyarrow disponível (CPython), o parse é feito em paralelo;
+          no formato 'lista' todos os valores continuam retornando como texto
+        - 'numpy'/'arrow' sem as bibliotecas instaladas voltam para 'lista'
     """
+    if formato not in ('lista', 'numpy', 'arrow'):
+        print("ERRO: formato '{}' inválido (use 'lista', 'numpy' ou 'arrow')".format(formato))
+        return {}
+
+    if formato != 'lista' and not (PYARROW_AVAILABLE and (formato == 'arrow' or NUMPY_AVAILABLE)):
+        print("AVISO: formato '{}' indisponível, usando 'lista'".format(formato))
+        formato = 'lista'
+
+    if PYARROW_AVAILABLE:
+        dados_dict = _ler_colunas_pyarrow(caminho_arquivo, formato)
+        if dados_dict is not None:
+            return dados_dict
+
     try:
         dados_dict = {}
 
-        with codecs.open(caminho_arquivo, 'r', encoding='utf-8-sig') as f:
-            leitor = csv.DictReader(f)
+        leitor = csv.DictReader(io.StringIO(_ler_texto_utf8(caminho_arquivo)))
 
-            # Inicializar listas para cada coluna
-            for fieldname in leitor.fieldnames:
-                dados_dict[fieldname] = []
+        # Inicializar listas para cada coluna
+        for fieldname in leitor.fieldnames:
+            dados_dict[fieldname] = []
 
-            # Adicionar valores em cada coluna
-            for row in leitor:
-                for fieldname in leitor.fieldnames:
-                    dados_dict[fieldname].append(row.get(fieldname, ''))
+        # Adicionar valores em cada coluna
+        for row in leitor:
+            for fieldname in leitor.fieldnames:
+                dados_dict[fieldname].append(row.get(fieldname, ''))
 
         print("CSV lido por colunas: {} colunas, {} linhas de {}".format(
             len(dados_dict),
-            len(dados_dict[dados_dict.keys()[0]]) if dados_dict else 0,
+            len(dados_dict[leitor.fieldnames[0]]) if dados_dict else 0,
             caminho_arquivo
         ))
         return dados_dict
@@ -421,6 +548,57 @@ def ler_csv_por_colunas(caminho_arquivo):
         return {}
 
 
+def _ler_colunas_pyarrow(caminho_arquivo, formato='lista'):
+    """
+    Lê CSV por colunas com o leitor multi-thread do pyarrow.
+
+    Returns:
+        dict: Mesmo formato de ler_csv_por_colunas, ou None se o pyarrow
+              não conseguir ler o arquivo (chamador usa o módulo csv)
+    """
+    try:
+        convert_options = None
+
+        if formato == 'lista':
+            # Cabeçalho lido à parte para forçar todas as colunas como texto
+            with io.open(caminho_arquivo, 'r', encoding='utf-8-sig', newline='') as f:
+                fieldnames = next(csv.reader(f), None)
+
+            if not fieldnames:
+                return None
+
+            convert_options = pa_csv.ConvertOptions(
+                column_types=dict((nome, pa.string()) for nome in fieldnames)
+            )
+
+        tabela = pa_csv.read_csv(
+            caminho_arquivo,
+            read_options=pa_csv.ReadOptions(
+                use_threads=True,
+                block_size=_BLOCO_LEITURA_PYARROW
+            ),
+            convert_options=convert_options
+        )
+
+        dados_dict = {}
+        for nome in tabela.column_names:
+            coluna = tabela.column(nome)
+            if formato == 'numpy':
+                dados_dict[nome] = coluna.to_numpy()
+            elif formato == 'arrow':
+                dados_dict[nome] = coluna
+            else:
+                dados_dict[nome] = coluna.to_pylist()
+
+        print("CSV lido por colunas: {} colunas, {} linhas de {}".format(
+            len(dados_dict), tabela.num_rows, caminho_arquivo
+        ))
+        return dados_dict
+
+    except Exception:
+        return None
+
+
 def adicionar_coluna_csv(caminho_arquivo, nome_coluna, valor_padrao=""):
     """
     Adiciona nova coluna ao CSV existente.
@@ -441,38 +619,70 @@ def adicionar_coluna_csv(caminho_arquivo, nome_coluna, valor_padrao=""):
         >>> #                 Parede,100,mm
 
     Notes:
-        - Lê CSV completo, adiciona coluna, reescreve arquivo
-        - Usa backup automático antes de modificar
+        - Processa linha a linha (ler → adicionar → escrever) num arquivo
+          temporário, sem carregar o CSV inteiro em memória
+        - O original só é substituído se a escrita terminar sem erro
+        - Mesmo formato de saída de escrever_csv_utf8 (aspas, UTF-8-sig)
     """
-    try:
-        # Ler CSV existente em modo tupla
-        headers, rows = ler_csv_utf8(caminho_arquivo, retornar_tupla=True)
-
-        if not headers:
-            print("ERRO: CSV vazio ou não encontrado")
-            return False
-
-        # Verificar se coluna já existe
-        if nome_coluna in headers:
-            print("AVISO: Coluna '{}' já existe, operação cancelada".format(nome_coluna))
-            return False
+    if not os.path.exists(caminho_arquivo):
+        print("ERRO: CSV vazio ou não encontrado")
+        return False
 
-        # Adicionar nova coluna no cabeçalho
-        headers.append(nome_coluna)
+    caminho_temp = caminho_arquivo + '.tmp'
+    headers = None
+    coluna_existente = False
+    total_linhas = 0
 
-        # Adicionar valor padrão em todas as linhas
-        for row in rows:
-            row.append(valor_padrao)
+    try:
+        with io.open(caminho_arquivo, 'r', encoding='utf-8-sig') as entrada:
+            with io.open(caminho_temp, 'wb', buffering=_BUFFER_ESCRITA) as saida:
+                write = saida.write
 
-        # Reescrever CSV
-        sucesso = escrever_csv_utf8(caminho_arquivo, headers, rows)
+                for linha in entrada:
+                    linha = linha.strip()
+                    if not linha:
+                        continue
+
+                    valores = _dividir_linha_csv(linha)
+
+                    if headers is None:
+                        # Verificar se coluna já existe
+                        if nome_coluna in valores:
+                            coluna_existente = True
+                            break
+
+                        # Adicionar nova coluna no cabeçalho
+                        headers = valores
+                        headers.append(nome_coluna)
+                        write(codecs.BOM_UTF8)
+                        write(_formatar_linha_csv(headers))
+                        continue
+
+                    # Adicionar valor padrão e completar colunas vazias
+                    valores.append(valor_padrao)
+                    while len(valores) < len(headers):
+                        valores.append(u'')
+
+                    write(_formatar_linha_csv(valores))
+                    total_linhas += 1
+
+        if headers is None:
+            os.remove(caminho_temp)
+            if coluna_existente:
+                print("AVISO: Coluna '{}' já existe, operação cancelada".format(nome_coluna))
+            else:
+                print("ERRO: CSV vazio ou não encontrado")
+            return False
 
-        if sucesso:
-            print("Coluna '{}' adicionada com sucesso (valor padrão: '{}')".format(nome_coluna, valor_padrao))
+        replace_file(caminho_temp, caminho_arquivo)
 
-        return sucesso
+        print("Coluna '{}' adicionada com sucesso (valor padrão: '{}', {} linhas)".format(
+            nome_coluna, valor_padrao, total_linhas))
+        return True
 
     except Exception as e:
+        if os.path.exists(caminho_temp):
+            os.remove(caminho_temp)
         print("ERRO ao adicionar coluna: {}".format(str(e)))
         return False
 
@@ -605,10 +815,26 @@ if __name__ == '__main__':
     assert len(headers_final) == 3, "Coluna não foi removida"
     assert 'Unidade' not in headers_final, "Coluna ainda existe"
 
+    # Teste 10: ida e volta com aspas e vírgula nos valores
+    rows_aspas = [[u'10"0', u'a, b', u'"x"']]
+    escrever_csv_utf8(arquivo_teste, headers_teste, rows_aspas)
+    _, rows_lidas = ler_csv_utf8(arquivo_teste, retornar_tupla=True)
+    escrever_csv_utf8(arquivo_teste, headers_teste, rows_lidas)
+    _, rows_relidas = ler_csv_utf8(arquivo_teste, retornar_tupla=True)
+    print("10. Ida e volta com aspas: {}".format(rows_relidas[0]))
+    assert rows_lidas[0] == rows_aspas[0], "Aspas alteradas na leitura"
+    assert rows_relidas[0] == rows_aspas[0], "Aspas acumuladas na regravação"
+
+    # Teste 11: linha de uma coluna vazia não some na ida e volta
+    escrever_csv_utf8(arquivo_teste, ['Nome'], [[u''], [u'A']])
+    _, rows_vazias = ler_csv_utf8(arquivo_teste, retornar_tupla=True)
+    print("11. Linha vazia preservada: {}".format(rows_vazias))
+    assert rows_vazias == [[u''], [u'A']], "Linha vazia perdida"
+
     # Limpar arquivos de teste
     if arquivo and os.path.exists(arquivo):
         os.remove(arquivo)
     if os.path.exists(arquivo_teste):
         os.remove(arquivo_teste)
 
-    print("\n✅ TODOS OS 9 TESTES PASSARAM!")
+    print("\n✅ TODOS OS 11 TESTES PASSARAM!")
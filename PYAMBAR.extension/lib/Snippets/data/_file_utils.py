@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+_file_utils.py
+Operações de arquivo compartilhadas pelos módulos de dados (CSV, estado).
+
+USAGE:
+    from Snippets.data._file_utils import replace_file
+
+    # Gravar num temporário e só então trocar pelo original
+    with open(caminho + '.tmp', 'wb') as f:
+        f.write(dados)
+    replace_file(caminho + '.tmp', caminho)
+
+DEPENDENCIES:
+    - os
+    - System.IO.File (IronPython) - troca atômica sem os.replace
+
+AUTHOR: Thiago Barreto
+VERSION: 1.0
+"""
+
+import os
+
+try:
+    from System.IO import File as _NetFile
+except ImportError:
+    _NetFile = None
+
+
+def replace_file(src, dst):
+    """
+    Move src sobre dst, substituindo dst se existir.
+
+    Usa os.replace (atômico) quando existe. No IronPython 2.7, sem
+    os.replace, usa System.IO.File.Replace (ReplaceFile do Windows), que
+    também troca o arquivo numa só operação; remover e renomear só como
+    último recurso (ex: destino ainda não existe).
+
+    Args:
+        src (str): Arquivo novo (ex: temporário recém-gravado)
+        dst (str): Arquivo final
+    """
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+        return
+
+    if os.path.exists(dst):
+        if _NetFile is not None:
+            _NetFile.Replace(src, dst, None)
+            return
+        os.remove(dst)
+    os.rename(src, dst)
@@ -7,6 +7,7 @@ USAGE:
     from Snippets.data._state_persistence import (
         save_state,
         load_state,
+        flush_state,
         get_state_file_path,
         restore_window_state,
         save_window_state
@@ -34,8 +35,17 @@ USAGE:
             }
             save_state(state, self.state_folder, self.state_file_name)
 
+        def ao_mover(self, sender, args):
+            # Eventos em rajada: gravações agrupadas (última vence)
+            save_window_state(self, self.state_folder, immediate=False)
+
+        def ao_fechar(self, sender, args):
+            flush_state()
+
 DEPENDENCIES:
-    - codecs, os, json
+    - copy, gzip, io, os, json, threading, time, atexit
+    - Snippets.data._file_utils (replace_file)
+    - orjson (opcional, CPython) - serialização mais rápida, mesmo formato
 
 AUTHOR: Thiago Barreto
 VERSION: 1.0 (Extraído de ParameterPalette em ITERATION 2 - 29/11/2025)
@@ -44,12 +54,197 @@ NOTES:
     - Suporta estados personalizados para qualquer janela WPF
     - Cria pasta de estado automaticamente
     - Usa UTF-8 encoding para caracteres especiais
+    - save_state(..., immediate=False) agrupa gravações em rajada
+      (DEBOUNCE_SEGUNDOS); pendências são gravadas no atexit ou em flush_state()
 """
 
-import codecs
+import atexit
+import copy
+import gzip
+import io
 import os
 import json
-from datetime import datetime
+import threading
+import time
+
+from Snippets.data._file_utils import replace_file
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+if ORJSON_AVAILABLE:
+    def _dumps(state_dict, compact=False):
+        """Serializa estado em bytes UTF-8 (indent 2, ou compacto)."""
+        option = orjson.OPT_NON_STR_KEYS
+        if not compact:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(state_dict, option=option)
+
+    def _loads(data):
+        """Desserializa bytes UTF-8 em dict."""
+        return orjson.loads(data)
+else:
+    def _dumps(state_dict, compact=False):
+        """Serializa estado em bytes UTF-8 (indent 2, ou compacto)."""
+        if compact:
+            texto = json.dumps(state_dict, separators=(',', ':'), ensure_ascii=False)
+        else:
+            texto = json.dumps(state_dict, indent=2, ensure_ascii=False)
+        return texto.encode('utf-8')
+
+    def _loads(data):
+        """Desserializa bytes UTF-8 em dict."""
+        return json.loads(data.decode('utf-8'))
+
+
+# Assinatura gzip: load_state descompacta arquivos gravados com gzip_over
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _gzip_bytes(data):
+    """Compacta bytes no formato gzip."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as f:
+        f.write(data)
+    return buffer.getvalue()
+
+
+def _gunzip_bytes(data):
+    """Descompacta bytes gzip."""
+    with gzip.GzipFile(fileobj=io.BytesIO(data), mode='rb') as f:
+        return f.read()
+
+
+# Janela de agrupamento das gravações com immediate=False
+DEBOUNCE_SEGUNDOS = 0.2
+
+# Gravações pendentes: state_file -> (state_dict, compact, gzip_over) / threading.Timer
+_pending_writes = {}
+_pending_timers = {}
+_pending_lock = threading.Lock()
+
+# Estados já lidos: state_file -> (st_mtime, st_size, state_dict)
+_load_cache = {}
+
+# Último conteúdo gravado (sem timestamp): state_file -> (st_mtime, st_size, dict)
+_last_written = {}
+
+# Pastas de estado já verificadas/criadas nesta sessão
+_ensured_dirs = set()
+
+# Índice texto → posição dos itens de ComboBox: id(combobox) -> dict
+_combobox_index_cache = {}
+
+
+def _timestamp():
+    """Timestamp ISO 8601 local (segundos), sem criar objeto datetime."""
+    return time.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _file_signature(state_file):
+    """(st_mtime, st_size) do arquivo, ou None se não existir."""
+    try:
+        st = os.stat(state_file)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size)
+
+
+def _write_state_file(state_file, state_dict, compact=False, gzip_over=None):
+    """Grava state_dict em state_file (JSON UTF-8) via arquivo temporário."""
+    # Conteúdo igual ao último gravado (ignorando timestamp) e arquivo
+    # intocado desde então → nada a gravar
+    conteudo = dict((k, v) for k, v in state_dict.items() if k != 'timestamp')
+    ultimo = _last_written.get(state_file)
+    if ultimo is not None and ultimo[2] == conteudo and ultimo[:2] == _file_signature(state_file):
+        return False
+
+    _load_cache.pop(state_file, None)
+    _last_written.pop(state_file, None)
+    data = _dumps(state_dict, compact)
+    if gzip_over is not None and len(data) > gzip_over:
+        data = _gzip_bytes(data)
+
+    # Arquivo final só é trocado após escrita completa do temporário
+    tmp_file = state_file + ".tmp"
+    try:
+        with io.open(tmp_file, 'wb') as f:
+            f.write(data)
+        replace_file(tmp_file, state_file)
+    except Exception:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+
+    assinatura = _file_signature(state_file)
+    if assinatura is not None:
+        _last_written[state_file] = assinatura + (copy.deepcopy(conteudo),)
+    return True
+
+
+def _pop_pending(state_file):
+    """Remove e retorna a gravação pendente de state_file (cancela o timer)."""
+    with _pending_lock:
+        pendente = _pending_writes.pop(state_file, None)
+        timer = _pending_timers.pop(state_file, None)
+
+    if timer:
+        timer.cancel()
+
+    return pendente
+
+
+def _flush_pending(state_file):
+    """Grava a pendência de state_file, se houver."""
+    pendente = _pop_pending(state_file)
+    if pendente is None:
+        return True
+
+    state_dict, compact, gzip_over = pendente
+
+    # Timestamp da gravação agrupada calculado uma vez, na gravação
+    if 'timestamp' not in state_dict:
+        state_dict['timestamp'] = _timestamp()
+
+    try:
+        _write_state_file(state_file, state_dict, compact, gzip_over)
+        return True
+    except Exception as e:
+        print("⚠️ ERRO ao salvar estado: {}".format(str(e)))
+        return False
+
+
+def flush_state(state_file=None):
+    """
+    Grava imediatamente as escritas pendentes de save_state(..., immediate=False).
+
+    Args:
+        state_file (str): Arquivo específico (padrão: todos os pendentes)
+
+    Returns:
+        bool: True se todas as gravações foram bem-sucedidas
+
+    Example:
+        >>> # No evento Closing da janela
+        >>> flush_state()
+    """
+    if state_file is not None:
+        return _flush_pending(state_file)
+
+    with _pending_lock:
+        state_files = list(_pending_writes)
+
+    sucesso = True
+    for path in state_files:
+        sucesso = _flush_pending(path) and sucesso
+    return sucesso
+
+
+atexit.register(flush_state)
 
 
 def get_state_file_path(script_path, state_folder_name="state", state_file_name="state.json"):
@@ -71,17 +266,24 @@ def get_state_file_path(script_path, state_folder_name="state", state_file_name=
         'C:\\...\\ParameterPalette.pushbutton\\state\\palette_state.json'
     """
     state_folder = os.path.join(script_path, state_folder_name)
-    if not os.path.exists(state_folder):
+    if state_folder not in _ensured_dirs:
+        # EAFP: sem exists() antes (os.makedirs sem exist_ok no IronPython 2.7)
         try:
             os.makedirs(state_folder)
+        except OSError:
+            if not os.path.isdir(state_folder):
+                print("⚠️ ERRO ao criar pasta de estado: {}".format(state_folder))
+                return None
         except Exception as e:
             print("⚠️ ERRO ao criar pasta de estado: {}".format(str(e)))
             return None
+        _ensured_dirs.add(state_folder)
 
     return os.path.join(state_folder, state_file_name)
 
 
-def save_state(state_dict, script_path, state_folder_name="state", state_file_name="state.json"):
+def save_state(state_dict, script_path, state_folder_name="state", state_file_name="state.json",
+               immediate=True, compact=False, gzip_over=None):
     """
     Salva estado em arquivo JSON com UTF-8.
 
@@ -90,34 +292,61 @@ def save_state(state_dict, script_path, state_folder_name="state", state_file_na
         script_path (str): Caminho do script
         state_folder_name (str): Nome da pasta de estado
         state_file_name (str): Nome do arquivo JSON
+        immediate (bool): Se False, agenda a gravação para daqui a
+                          DEBOUNCE_SEGUNDOS; novas chamadas para o mesmo
+                          arquivo nesse intervalo substituem a pendente
+        compact (bool): JSON sem indentação (separators=(',', ':')) - para
+                        estados que ninguém lê à mão (ex: geometria de janela)
+        gzip_over (int): Compactar com gzip quando o JSON passar deste
+                         tamanho em bytes (ex: 64 * 1024). None = nunca
 
     Returns:
-        bool: True se salvamento bem-sucedido, False se erro
+        bool: True se salvamento bem-sucedido (ou agendado), False se erro
 
     Example:
         >>> state = {
         ...     'parameters': {'Comentarios': {'enabled': True, 'selected_value': 'Pilar'}},
-        ...     'csv_file': 'data.csv',
-        ...     'timestamp': datetime.now().isoformat()
+        ...     'csv_file': 'data.csv'
         ... }
         >>> sucesso = save_state(state, PATH_SCRIPT, "state", "palette_state.json")
 
     Notes:
         - Adiciona timestamp automaticamente se não fornecido
-        - Usa indent=2 para legibilidade
+        - Usa indent=2 para legibilidade (exceto compact=True)
+        - Arquivos gzip são lidos de forma transparente por load_state
         - ensure_ascii=False preserva caracteres UTF-8
+        - immediate=False: usar flush_state() no fechamento da janela
+        - Escrita atômica (arquivo .tmp + os.replace): falha no meio da
+          gravação não corrompe o estado anterior
+        - Estado idêntico ao último gravado (exceto timestamp) não é
+          regravado, desde que o arquivo não tenha sido alterado por fora
     """
     try:
-        # Adicionar timestamp se não existir
-        if 'timestamp' not in state_dict:
-            state_dict['timestamp'] = datetime.now().isoformat()
-
         state_file = get_state_file_path(script_path, state_folder_name, state_file_name)
         if not state_file:
             return False
 
-        with codecs.open(state_file, 'w', encoding='utf-8') as f:
-            json.dump(state_dict, f, indent=2, ensure_ascii=False)
+        if immediate:
+            # Adicionar timestamp se não existir
+            if 'timestamp' not in state_dict:
+                state_dict['timestamp'] = _timestamp()
+
+            # Pendência mais antiga para o mesmo arquivo fica obsoleta
+            _pop_pending(state_file)
+            _write_state_file(state_file, state_dict, compact, gzip_over)
+            return True
+
+        timer = threading.Timer(DEBOUNCE_SEGUNDOS, _flush_pending, args=[state_file])
+        timer.daemon = True
+
+        with _pending_lock:
+            _pending_writes[state_file] = (dict(state_dict), compact, gzip_over)
+            anterior = _pending_timers.pop(state_file, None)
+            _pending_timers[state_file] = timer
+
+        if anterior:
+            anterior.cancel()
+        timer.start()
 
         return True
 
@@ -143,23 +372,50 @@ def load_state(script_path, state_folder_name="state", state_file_name="state.js
         >>> if state:
         ...     print("CSV anterior:", state.get('csv_file'))
         ...     print("Timestamp:", state.get('timestamp'))
+
+    Notes:
+        - Parse reaproveitado enquanto mtime/tamanho do arquivo não mudarem
+        - Sempre retorna uma cópia (pode ser modificada pelo chamador)
     """
     try:
         state_file = get_state_file_path(script_path, state_folder_name, state_file_name)
-        if not state_file or not os.path.exists(state_file):
+        if not state_file:
             return None
 
-        with codecs.open(state_file, 'r', encoding='utf-8') as f:
-            state = json.load(f)
+        # Gravação agendada ainda não feita → gravar antes de ler
+        _flush_pending(state_file)
+
+        # stat único: existência + assinatura do cache
+        try:
+            st = os.stat(state_file)
+        except OSError:
+            return None
+
+        # Arquivo inalterado desde a última leitura → reutilizar o parse
+        assinatura = (st.st_mtime, st.st_size)
+        cached = _load_cache.get(state_file)
+        if cached is not None and cached[:2] == assinatura:
+            return copy.deepcopy(cached[2])
+
+        # Leitura sem buffer intermediário: arquivo inteiro de uma vez,
+        # decodificado em uma passada por _loads
+        with io.open(state_file, 'rb', buffering=0) as f:
+            data = f.read()
+
+        if data[:2] == _GZIP_MAGIC:
+            data = _gunzip_bytes(data)
+        state = _loads(data)
 
-        return state
+        _load_cache[state_file] = assinatura + (state,)
+        return copy.deepcopy(state)
 
     except Exception as e:
         print("⚠️ ERRO ao carregar estado: {}".format(str(e)))
         return None
 
 
-def save_window_state(window, script_path, state_folder_name="state", state_file_name="window_state.json"):
+def save_window_state(window, script_path, state_folder_name="state", state_file_name="window_state.json",
+                      immediate=True):
     """
     Salva posição e tamanho de janela WPF.
 
@@ -168,6 +424,8 @@ def save_window_state(window, script_path, state_folder_name="state", state_file
         script_path (str): Caminho do script
         state_folder_name (str): Nome da pasta de estado
         state_file_name (str): Nome do arquivo JSON
+        immediate (bool): False para eventos em rajada (LocationChanged,
+                          SizeChanged) - ver save_state
 
     Returns:
         bool: True se salvamento bem-sucedido, False se erro
@@ -185,11 +443,10 @@ def save_window_state(window, script_path, state_folder_name="state", state_file
                 'width': window.Width,
                 'height': window.Height,
                 'window_state': str(window.WindowState)  # Normal, Minimized, Maximized
-            },
-            'timestamp': datetime.now().isoformat()
+            }
         }
 
-        return save_state(state, script_path, state_folder_name, state_file_name)
+        return save_state(state, script_path, state_folder_name, state_file_name, immediate)
 
     except Exception as e:
         print("⚠️ ERRO ao salvar estado da janela: {}".format(str(e)))
@@ -240,13 +497,16 @@ def restore_window_state(window, script_path, state_folder_name="state", state_f
         return False
 
 
-def restore_parameter_controls(param_controls, state_dict):
+def restore_parameter_controls(param_controls, state_dict, dispatcher=None):
     """
     Restaura estado de controles de parâmetros (específico para ParameterPalette).
 
     Args:
         param_controls (dict): Dicionário de controles {param_name: {'combo': combo, 'toggle': toggle}}
         state_dict (dict): Estado carregado com load_state()
+        dispatcher: Dispatcher da janela (opcional). Se informado, o
+                    processamento do Dispatcher fica suspenso durante a
+                    restauração e o WPF aplica layout/render uma única vez
 
     Returns:
         bool: True se restauração bem-sucedida, False se erro
@@ -255,7 +515,7 @@ def restore_parameter_controls(param_controls, state_dict):
         >>> # Em ParameterPalette após criar controles
         >>> state = load_state(PATH_SCRIPT, "state", "palette_state.json")
         >>> if state:
-        ...     restore_parameter_controls(self.param_controls, state)
+        ...     restore_parameter_controls(self.param_controls, state, self.Dispatcher)
 
     Notes:
         - Compatível 100% com formato JSON do ParameterPalette v2.3.1
@@ -266,21 +526,16 @@ def restore_parameter_controls(param_controls, state_dict):
         return False
 
     try:
-        for param_name, param_state in state_dict['parameters'].items():
-            if param_name in param_controls:
-                controls = param_controls[param_name]
-                combo = controls.get("combo")
-                toggle = controls.get("toggle")
-
-                # Restaurar toggle (enabled/disabled)
-                if toggle and 'enabled' in param_state:
-                    toggle.IsChecked = param_state['enabled']
-
-                # Restaurar valor selecionado no combo
-                if combo and 'selected_value' in param_state:
-                    selected_value = param_state['selected_value']
-                    if selected_value:
-                        combo.Text = selected_value
+        state_params = state_dict['parameters']
+
+        # DisableProcessing() retorna IDisposable: Dispose() reativa o
+        # Dispatcher, que processa de uma vez as atualizações enfileiradas
+        suspensao = dispatcher.DisableProcessing() if dispatcher is not None else None
+        try:
+            _apply_parameter_states(param_controls, state_params)
+        finally:
+            if suspensao is not None:
+                suspensao.Dispose()
 
         return True
 
@@ -289,6 +544,27 @@ def restore_parameter_controls(param_controls, state_dict):
         return False
 
 
+def _apply_parameter_states(param_controls, state_params):
+    """Aplica enabled/selected_value de state_params aos controles de param_controls."""
+    for param_name, controls in param_controls.items():
+        param_state = state_params.get(param_name)
+        if param_state is None:
+            continue
+
+        combo = controls.get("combo")
+        toggle = controls.get("toggle")
+
+        # Restaurar toggle (enabled/disabled)
+        if toggle and 'enabled' in param_state:
+            toggle.IsChecked = param_state['enabled']
+
+        # Restaurar valor selecionado no combo
+        if combo:
+            selected_value = param_state.get('selected_value')
+            if selected_value:
+                combo.Text = selected_value
+
+
 def restore_combobox_selection(combobox, state_dict, state_key):
     """
     Restaura seleção de ComboBox genérico.
@@ -306,6 +582,10 @@ def restore_combobox_selection(combobox, state_dict, state_key):
         >>> state = load_state(PATH_SCRIPT)
         >>> if state:
         ...     restore_combobox_selection(self.combo_template, state, 'selected_template')
+
+    Notes:
+        - Índice texto → posição guardado por ComboBox: restaurações
+          seguintes fazem uma busca em dict em vez de percorrer os itens
     """
     if not state_dict or state_key not in state_dict:
         return False
@@ -315,19 +595,53 @@ def restore_combobox_selection(combobox, state_dict, state_key):
         if not selected_value:
             return False
 
-        # Buscar item correspondente
-        for i in range(combobox.Items.Count):
-            if str(combobox.Items[i]) == selected_value:
+        items = combobox.Items
+        chave = id(combobox)
+
+        # Índice em cache só é usado se o item ainda corresponder
+        # (itens podem ter mudado desde a última restauração)
+        indice = _combobox_index_cache.get(chave)
+        if indice is not None:
+            i = indice.get(selected_value)
+            if i is not None and i < items.Count and str(items[i]) == selected_value:
                 combobox.SelectedIndex = i
                 return True
 
-        return False
+        # (Re)construir índice - primeira ocorrência de cada texto
+        indice = {}
+        for i in range(items.Count):
+            indice.setdefault(str(items[i]), i)
+        _combobox_index_cache[chave] = indice
+
+        i = indice.get(selected_value)
+        if i is None:
+            return False
+
+        combobox.SelectedIndex = i
+        return True
 
     except Exception as e:
         print("⚠️ ERRO ao restaurar ComboBox: {}".format(str(e)))
         return False
 
 
+def clear_combobox_cache(combobox=None):
+    """
+    Descarta o índice de itens usado por restore_combobox_selection.
+
+    Args:
+        combobox: ComboBox específico (padrão: todos)
+
+    Notes:
+        - Opcional: índice desatualizado é detectado e reconstruído,
+          limpar apenas libera memória (ex: ao fechar a janela)
+    """
+    if combobox is None:
+        _combobox_index_cache.clear()
+    else:
+        _combobox_index_cache.pop(id(combobox), None)
+
+
 # TESTES UNITÁRIOS
 if __name__ == '__main__':
     print("=== TESTANDO _state_persistence.py ===\n")
@@ -385,10 +699,50 @@ if __name__ == '__main__':
     print("6. load_state (inexistente): {}".format(state_inexistente))
     assert state_inexistente is None, "Deveria retornar None para arquivo inexistente"
 
+    # Teste 7: save_state agrupado (immediate=False)
+    for i in range(5):
+        save_state({'contador': i}, temp_dir, "state", "test_debounce.json", immediate=False)
+    arquivo_debounce = get_state_file_path(temp_dir, "state", "test_debounce.json")
+    print("7. Gravação agendada: existe={}".format(os.path.exists(arquivo_debounce)))
+    assert not os.path.exists(arquivo_debounce), "Gravação não foi agendada"
+    assert flush_state() == True, "flush_state falhou"
+    state_debounce = load_state(temp_dir, "state", "test_debounce.json")
+    assert state_debounce['contador'] == 4, "Última gravação não prevaleceu"
+
+    # Teste 8: cache do load_state (cópia independente + invalidação)
+    state_debounce['contador'] = 99
+    state_cache = load_state(temp_dir, "state", "test_debounce.json")
+    print("8. load_state (cache): contador={}".format(state_cache['contador']))
+    assert state_cache['contador'] == 4, "Cache retornou objeto compartilhado"
+    save_state({'contador': 5}, temp_dir, "state", "test_debounce.json")
+    assert load_state(temp_dir, "state", "test_debounce.json")['contador'] == 5, "Cache não invalidado"
+
+    # Teste 9: estado inalterado não é regravado (exceto se alterado por fora)
+    arquivo_debounce = get_state_file_path(temp_dir, "state", "test_debounce.json")
+    mtime_antes = os.stat(arquivo_debounce).st_mtime
+    save_state({'contador': 5}, temp_dir, "state", "test_debounce.json")
+    regravado = os.stat(arquivo_debounce).st_mtime != mtime_antes
+    print("9. Estado inalterado regravado: {}".format(regravado))
+    assert not regravado, "Estado inalterado foi regravado"
+    os.utime(arquivo_debounce, (mtime_antes - 10, mtime_antes - 10))
+    save_state({'contador': 5}, temp_dir, "state", "test_debounce.json")
+    assert os.stat(arquivo_debounce).st_mtime != mtime_antes - 10, "Arquivo alterado por fora não foi regravado"
+
+    # Teste 10: compact + gzip lidos de forma transparente
+    state_grande = {'valores': list(range(2000))}
+    save_state(state_grande, temp_dir, "state", "test_gzip.json", compact=True, gzip_over=1024)
+    arquivo_gzip = get_state_file_path(temp_dir, "state", "test_gzip.json")
+    with open(arquivo_gzip, 'rb') as f:
+        compactado = f.read(2) == b'\x1f\x8b'
+    state_gzip = load_state(temp_dir, "state", "test_gzip.json")
+    print("10. gzip: compactado={}, valores={}".format(compactado, len(state_gzip['valores'])))
+    assert compactado, "Arquivo não foi compactado"
+    assert state_gzip['valores'] == state_grande['valores'], "Conteúdo gzip incorreto"
+
     # Limpar pasta temporária
     import shutil
     shutil.rmtree(temp_dir)
 
-    print("\n✅ TODOS OS 6 TESTES PASSARAM!")
+    print("\n✅ TODOS OS 10 TESTES PASSARAM!")
     print("\nNOTA: Testes de WPF (restore_window_state, restore_parameter_controls)")
     print("      requerem ambiente Revit com System.Windows.Window disponível")
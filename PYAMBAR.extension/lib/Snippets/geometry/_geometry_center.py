@@ -6,6 +6,7 @@ Funções para cálculo de centros geométricos de elementos Revit.
 USAGE:
     from Snippets.geometry._geometry_center import obter_centro_elemento
     from Snippets.geometry._geometry_center import obter_centro_boundingbox
+    from Snippets.geometry._geometry_center import obter_bbox_info
 
     # Obter centro de um elemento
     wall = UnwrapElement(some_wall)
@@ -16,14 +17,44 @@ USAGE:
     bbox = wall.get_BoundingBox(None)
     centro_bbox = obter_centro_boundingbox(bbox)
 
+    # Centro + dimensões com uma única BoundingBox
+    info = obter_bbox_info(wall)
+
 DEPENDENCIES:
     - Autodesk.Revit.DB
+    - pyrevit.script (logger; erros por elemento em logger.debug)
+    - numpy (opcional, CPython) - média de obter_centro_multiple_elements e
+      matriz de distancias_entre_elementos
 
 AUTHOR: Thiago Barreto
 VERSION: 1.0
 """
 
+import math
+
 from Autodesk.Revit.DB import *
+from pyrevit import script
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# Erros por elemento vão para logger.debug: sem print() em loops grandes
+# (saída do pyRevit é lenta); visíveis no modo debug do pyRevit
+logger = script.get_logger()
+
+
+# Centro por tipo de Location: um lookup por type() em vez de isinstance
+# encadeados (cada isinstance com tipo .NET é uma consulta ao CLR)
+_CENTRO_POR_LOCATION = {
+    # MÉTODO 1: LocationPoint (pilares, famílias, etc.)
+    LocationPoint: lambda location: location.Point,
+    # MÉTODO 2: LocationCurve (paredes, vigas, tubos) - parâmetro 0.5 normalizado
+    LocationCurve: lambda location: location.Curve.Evaluate(0.5, True),
+}
 
 
 def obter_centro_boundingbox(bounding_box):
@@ -44,15 +75,15 @@ def obter_centro_boundingbox(bounding_box):
     if not bounding_box:
         return None
 
-    # Centro = (Min + Max) / 2
+    # Centro = (Min + Max) * 0.5 (Min/Max lidos uma vez cada via interop)
     min_point = bounding_box.Min
     max_point = bounding_box.Max
 
-    centro_x = (min_point.X + max_point.X) / 2.0
-    centro_y = (min_point.Y + max_point.Y) / 2.0
-    centro_z = (min_point.Z + max_point.Z) / 2.0
-
-    return XYZ(centro_x, centro_y, centro_z)
+    return XYZ(
+        (min_point.X + max_point.X) * 0.5,
+        (min_point.Y + max_point.Y) * 0.5,
+        (min_point.Z + max_point.Z) * 0.5
+    )
 
 
 def obter_centro_elemento(elemento, view=None):
@@ -80,27 +111,96 @@ def obter_centro_elemento(elemento, view=None):
     try:
         location = elemento.Location
 
-        # MÉTODO 1: LocationPoint (pilares, famílias, etc.)
-        if isinstance(location, LocationPoint):
-            return location.Point
-
-        # MÉTODO 2: LocationCurve (paredes, vigas, tubos, etc.)
-        elif isinstance(location, LocationCurve):
-            curve = location.Curve
-            # Ponto médio = parâmetro 0.5 normalizado
-            return curve.Evaluate(0.5, True)
+        # MÉTODOS 1 e 2: LocationPoint / LocationCurve
+        obter_centro = _CENTRO_POR_LOCATION.get(type(location))
+        if obter_centro is not None:
+            return obter_centro(location)
 
         # MÉTODO 3: BoundingBox (rooms, áreas, elementos complexos)
-        else:
-            bbox = elemento.get_BoundingBox(view)
-            if bbox:
-                return obter_centro_boundingbox(bbox)
+        bbox = elemento.get_BoundingBox(view)
+        if bbox:
+            return obter_centro_boundingbox(bbox)
 
         # Se chegou aqui, não conseguiu determinar centro
         return None
 
     except Exception as e:
-        print("ERRO ao obter centro do elemento ID {}: {}".format(elemento.Id, str(e)))
+        # Formatação só acontece se o debug estiver habilitado
+        logger.debug("ERRO ao obter centro do elemento ID %s: %s", elemento.Id, e)
+        return None
+
+
+def criar_funcao_centro(elemento_exemplo, view=None):
+    """
+    Cria função de centro especializada no tipo de Location do elemento exemplo.
+
+    Para listas homogêneas (só paredes, só pilares...) a função retornada
+    vai direto ao método certo, sem consultar o tipo de Location a cada
+    elemento. Elemento que não se encaixar cai em obter_centro_elemento.
+
+    Args:
+        elemento_exemplo (Element): Elemento representativo da lista
+        view (View): Vista de referência para BoundingBox (opcional)
+
+    Returns:
+        function: f(elemento) -> XYZ ou None
+
+    Example:
+        >>> paredes = list(FilteredElementCollector(doc).OfClass(Wall))
+        >>> centro_de = criar_funcao_centro(paredes[0])
+        >>> centros = [centro_de(p) for p in paredes]
+    """
+    tipo_location = type(elemento_exemplo.Location)
+
+    if tipo_location is LocationPoint:
+        def obter_centro_especializado(elemento):
+            return elemento.Location.Point
+    elif tipo_location is LocationCurve:
+        def obter_centro_especializado(elemento):
+            return elemento.Location.Curve.Evaluate(0.5, True)
+    else:
+        return lambda elemento: obter_centro_elemento(elemento, view)
+
+    def obter_centro(elemento):
+        try:
+            return obter_centro_especializado(elemento)
+        except Exception:
+            # Location de outro tipo (lista heterogênea) ou inválida
+            return obter_centro_elemento(elemento, view)
+
+    return obter_centro
+
+
+def _centro_coordenadas(elemento, view=None):
+    """
+    Mesmo centro de obter_centro_elemento, como tupla (x, y, z).
+
+    Para elementos via BoundingBox o centro é calculado direto em escalares,
+    sem criar XYZ intermediário. Retorna None se não conseguir obter.
+    """
+    try:
+        location = elemento.Location
+
+        obter_centro = _CENTRO_POR_LOCATION.get(type(location))
+        if obter_centro is not None:
+            ponto = obter_centro(location)
+            return (ponto.X, ponto.Y, ponto.Z)
+
+        bbox = elemento.get_BoundingBox(view)
+        if bbox:
+            min_point = bbox.Min
+            max_point = bbox.Max
+            return (
+                (min_point.X + max_point.X) * 0.5,
+                (min_point.Y + max_point.Y) * 0.5,
+                (min_point.Z + max_point.Z) * 0.5
+            )
+
+        return None
+
+    except Exception as e:
+        # Formatação só acontece se o debug estiver habilitado
+        logger.debug("ERRO ao obter centro do elemento ID %s: %s", elemento.Id, e)
         return None
 
 
@@ -123,28 +223,25 @@ def obter_centro_multiple_elements(elementos_lista, view=None):
     if not elementos_lista or len(elementos_lista) == 0:
         return None
 
-    soma_x = 0.0
-    soma_y = 0.0
-    soma_z = 0.0
-    count_validos = 0
-
+    # Coordenadas extraídas uma vez por elemento (custo dominante: API Revit)
+    pontos = []
     for elem in elementos_lista:
-        centro = obter_centro_elemento(elem, view)
+        centro = _centro_coordenadas(elem, view)
         if centro:
-            soma_x += centro.X
-            soma_y += centro.Y
-            soma_z += centro.Z
-            count_validos += 1
+            pontos.append(centro)
 
-    if count_validos == 0:
+    if not pontos:
         return None
 
     # Média aritmética
-    centro_x = soma_x / count_validos
-    centro_y = soma_y / count_validos
-    centro_z = soma_z / count_validos
+    if NUMPY_AVAILABLE:
+        media = np.array(pontos, dtype=np.float64).mean(axis=0)
+        return XYZ(float(media[0]), float(media[1]), float(media[2]))
 
-    return XYZ(centro_x, centro_y, centro_z)
+    count_validos = float(len(pontos))
+    soma_x, soma_y, soma_z = [sum(eixo) for eixo in zip(*pontos)]
+
+    return XYZ(soma_x / count_validos, soma_y / count_validos, soma_z / count_validos)
 
 
 def obter_centro_com_offset(elemento, offset_x=0, offset_y=0, offset_z=0, view=None):
@@ -165,24 +262,24 @@ def obter_centro_com_offset(elemento, offset_x=0, offset_y=0, offset_z=0, view=N
         >>> # Obter centro 10 pés acima do elemento
         >>> centro_acima = obter_centro_com_offset(elemento, offset_z=10.0)
     """
-    centro_base = obter_centro_elemento(elemento, view)
+    # Escalares direto: um único XYZ criado, já com offset
+    centro_base = _centro_coordenadas(elemento, view)
 
     if not centro_base:
         return None
 
-    return XYZ(
-        centro_base.X + offset_x,
-        centro_base.Y + offset_y,
-        centro_base.Z + offset_z
-    )
+    x, y, z = centro_base
+    return XYZ(x + offset_x, y + offset_y, z + offset_z)
 
 
-def obter_altura_elemento(elemento):
+def obter_altura_elemento(elemento, bbox=None):
     """
     Calcula altura (dimensão Z) de um elemento via BoundingBox.
 
     Args:
         elemento (Element): Elemento Revit
+        bbox (BoundingBoxXYZ): BoundingBox já obtida (opcional, evita nova
+                               consulta de geometria ao Revit)
 
     Returns:
         float: Altura do elemento em unidades internas (pés)
@@ -191,25 +288,31 @@ def obter_altura_elemento(elemento):
         >>> pilar = UnwrapElement(some_column)
         >>> altura = obter_altura_elemento(pilar)
         >>> print("Altura do pilar: {:.2f} pés".format(altura))
+
+        >>> # Altura e dimensões do mesmo elemento: uma única BoundingBox
+        >>> bbox = pilar.get_BoundingBox(None)
+        >>> altura = obter_altura_elemento(pilar, bbox)
+        >>> dims = obter_dimensoes_elemento(pilar, bbox)
     """
     try:
-        bbox = elemento.get_BoundingBox(None)
+        if bbox is None:
+            bbox = elemento.get_BoundingBox(None)
         if not bbox:
             return 0.0
 
-        altura = bbox.Max.Z - bbox.Min.Z
-        return altura
+        return bbox.Max.Z - bbox.Min.Z
 
     except:
         return 0.0
 
 
-def obter_dimensoes_elemento(elemento):
+def obter_dimensoes_elemento(elemento, bbox=None):
     """
     Obtém dimensões (largura, profundidade, altura) de um elemento via BoundingBox.
 
     Args:
         elemento (Element): Elemento Revit
+        bbox (BoundingBoxXYZ): BoundingBox já obtida (opcional)
 
     Returns:
         dict: {'largura': float, 'profundidade': float, 'altura': float}
@@ -222,24 +325,69 @@ def obter_dimensoes_elemento(elemento):
         ... ))
     """
     try:
-        bbox = elemento.get_BoundingBox(None)
+        if bbox is None:
+            bbox = elemento.get_BoundingBox(None)
         if not bbox:
             return {'largura': 0.0, 'profundidade': 0.0, 'altura': 0.0}
 
-        largura = bbox.Max.X - bbox.Min.X
-        profundidade = bbox.Max.Y - bbox.Min.Y
-        altura = bbox.Max.Z - bbox.Min.Z
+        min_point = bbox.Min
+        max_point = bbox.Max
 
         return {
-            'largura': largura,
-            'profundidade': profundidade,
-            'altura': altura
+            'largura': max_point.X - min_point.X,
+            'profundidade': max_point.Y - min_point.Y,
+            'altura': max_point.Z - min_point.Z
         }
 
     except:
         return {'largura': 0.0, 'profundidade': 0.0, 'altura': 0.0}
 
 
+def obter_bbox_info(elemento, view=None):
+    """
+    Obtém centro e dimensões de um elemento com uma única consulta de BoundingBox.
+
+    Para quem precisa de mais de um valor derivado (centro + altura,
+    dimensões completas...) - uma avaliação de geometria no Revit em vez
+    de uma por função auxiliar.
+
+    Args:
+        elemento (Element): Elemento Revit
+        view (View): Vista de referência (opcional, usa None para global)
+
+    Returns:
+        dict: {'centro': XYZ, 'largura': float, 'profundidade': float, 'altura': float}
+              Valores em unidades internas (pés), ou None se sem BoundingBox
+
+    Example:
+        >>> info = obter_bbox_info(pilar)
+        >>> if info:
+        ...     topo = info['centro'].Z + info['altura'] * 0.5
+    """
+    try:
+        bbox = elemento.get_BoundingBox(view)
+        if not bbox:
+            return None
+
+        min_point = bbox.Min
+        max_point = bbox.Max
+
+        return {
+            'centro': XYZ(
+                (min_point.X + max_point.X) * 0.5,
+                (min_point.Y + max_point.Y) * 0.5,
+                (min_point.Z + max_point.Z) * 0.5
+            ),
+            'largura': max_point.X - min_point.X,
+            'profundidade': max_point.Y - min_point.Y,
+            'altura': max_point.Z - min_point.Z
+        }
+
+    except Exception as e:
+        logger.debug("ERRO ao obter BoundingBox do elemento ID %s: %s", elemento.Id, e)
+        return None
+
+
 def distancia_entre_elementos(elemento1, elemento2, view=None):
     """
     Calcula distância euclidiana entre centros de dois elementos.
@@ -267,6 +415,55 @@ def distancia_entre_elementos(elemento1, elemento2, view=None):
     return centro1.DistanceTo(centro2)
 
 
+def distancias_entre_elementos(elementos_lista, view=None):
+    """
+    Calcula matriz de distâncias entre os centros de todos os pares de elementos.
+
+    Cada centro é obtido uma única vez (N consultas ao Revit em vez de N²
+    com distancia_entre_elementos em loop duplo).
+
+    Args:
+        elementos_lista (list): Lista de elementos Revit
+        view (View): Vista de referência (opcional)
+
+    Returns:
+        numpy.ndarray (N, N) se numpy disponível, senão list de lists.
+        Linha/coluna de elemento sem centro: NaN (numpy) ou None.
+
+    Example:
+        >>> pilares = list(FilteredElementCollector(doc).OfCategory(BuiltInCategory.OST_StructuralColumns))
+        >>> matriz = distancias_entre_elementos(pilares)
+        >>> print("Distância pilar 0 → 1: {:.2f} pés".format(matriz[0][1]))
+    """
+    pontos = [_centro_coordenadas(elem, view) for elem in elementos_lista]
+
+    if NUMPY_AVAILABLE:
+        nan = float('nan')
+        coords = np.array([p if p else (nan, nan, nan) for p in pontos], dtype=np.float64)
+        diff = coords[:, None, :] - coords[None, :, :]
+        return np.sqrt((diff * diff).sum(axis=-1))
+
+    sqrt = math.sqrt
+    matriz = []
+    for p1 in pontos:
+        if p1 is None:
+            matriz.append([None] * len(pontos))
+            continue
+        x1, y1, z1 = p1
+        linha = []
+        for p2 in pontos:
+            if p2 is None:
+                linha.append(None)
+            else:
+                dx = x1 - p2[0]
+                dy = y1 - p2[1]
+                dz = z1 - p2[2]
+                linha.append(sqrt(dx * dx + dy * dy + dz * dz))
+        matriz.append(linha)
+
+    return matriz
+
+
 # TESTES UNITÁRIOS
 if __name__ == '__main__':
     print("=== TESTANDO _geometry_center.py ===\n")
@@ -5,10 +5,55 @@ Funções reutilizáveis para trabalhar com elementos MEP, conectores,
 e sistemas. Inspirado em pyRevitMEP (Cyril Waechter).
 """
 
-from math import pi, degrees, sqrt
+from math import pi, degrees, sqrt, acos, hypot
 from Autodesk.Revit.DB import *
 from Autodesk.Revit import Exceptions
 
+# numpy/scipy são opcionais (indisponíveis no IronPython)
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# KD-tree para pares próximos
+try:
+    from scipy.spatial import cKDTree
+    SCIPY_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# Numba compila o kernel de par mais próximo (só CPython)
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Abaixo deste número de pares o loop direto é mais rápido que montar a árvore
+KDTREE_MIN_PAIRS = 64
+
+# Abaixo deste número de pares não compensa montar arrays para o kernel numba
+NUMBA_MIN_PAIRS = 64
+
+# Abaixo deste número de conectores o loop direto evita o custo de montar arrays
+NUMPY_MIN_CONNECTORS = 16
+
+# cos(10°): |dir1·dir2| acima disto = quase paralelo/oposto (< 10° ou > 170°)
+COS_10 = 0.984807753012208
+
+# Eixos padrão (calculate_rotation_axis) - propriedades estáticas lidas uma vez
+_BASIS_X = XYZ.BasisX
+_BASIS_Z = XYZ.BasisZ
+
+# Nomes legíveis dos domínios (get_connector_domain_name)
+_DOMAIN_NAMES = {
+    Domain.DomainHvac: "HVAC (Ar Condicionado)",
+    Domain.DomainPiping: "Hidráulico (Tubulação)",
+    Domain.DomainElectrical: "Elétrico",
+    Domain.DomainCableTrayConduit: "Bandeja/Eletroduto"
+}
+
 
 # ==================== CONNECTOR UTILITIES ====================
 
@@ -35,14 +80,14 @@ def get_connector_manager(element):
         ...     print(conn.Origin)
     """
     # Tenta como MEPCurve (pipes, ducts, cable trays, conduits)
-    if hasattr(element, 'ConnectorManager'):
-        return element.ConnectorManager
+    cm = getattr(element, 'ConnectorManager', None)
     
     # Tenta como FamilyInstance (equipamentos, fittings)
-    if hasattr(element, 'MEPModel'):
-        mep_model = element.MEPModel
-        if mep_model and hasattr(mep_model, 'ConnectorManager'):
-            return mep_model.ConnectorManager
+    if cm is None:
+        cm = getattr(getattr(element, 'MEPModel', None), 'ConnectorManager', None)
+    
+    if cm is not None:
+        return cm
     
     raise AttributeError(
         "Elemento '{}' (ID: {}) não possui ConnectorManager".format(
@@ -78,6 +123,95 @@ def get_unused_connectors(element):
     return list(cm.UnusedConnectors)
 
 
+def iter_connectors(element):
+    """Itera sobre os conectores de um elemento sem materializar lista.
+    
+    Para buscas com saída antecipada (any(), next(), primeiro que atende).
+    
+    Args:
+        element: Elemento MEP
+        
+    Returns:
+        iterator: Iterador de Connector objects
+    """
+    return iter(get_connector_manager(element).Connectors)
+
+
+def iter_unused_connectors(element):
+    """Itera sobre os conectores não usados sem materializar lista.
+    
+    Args:
+        element: Elemento MEP
+        
+    Returns:
+        iterator: Iterador de conectores não conectados
+        
+    Examples:
+        >>> has_free = next(iter_unused_connectors(pipe), None) is not None
+    """
+    return iter(get_connector_manager(element).UnusedConnectors)
+
+
+def connectors_to_soa(connectors):
+    """Extrai conectores e suas origens em arrays paralelos (uma passada).
+    
+    Cada Origin/X/Y/Z cruza a fronteira .NET uma única vez; a matemática
+    seguinte roda sobre floats locais.
+    
+    Args:
+        connectors: ConnectorSet, lista, ou iterável de conectores
+        
+    Returns:
+        tuple: (list conectores, pontos) - pontos é np.ndarray (N, 3) float64
+               com numpy, ou lista de tuplas (x, y, z) sem numpy
+    
+    Examples:
+        >>> conns, pts = connectors_to_soa(cm.UnusedConnectors)
+        >>> conns[0], pts[0]
+    """
+    conns = []
+    coords = []
+    for connector in connectors:
+        origin = connector.Origin
+        conns.append(connector)
+        coords.append((origin.X, origin.Y, origin.Z))
+    
+    if NUMPY_AVAILABLE:
+        return conns, np.array(coords, dtype=np.float64).reshape(len(coords), 3)
+    return conns, coords
+
+
+def _closest_pair_soa(pts1, pts2):
+    """Par mais próximo entre dois arrays de pontos (N, 3) e (M, 3).
+    
+    Kernel numérico puro; compilado com numba.njit quando disponível.
+    
+    Returns:
+        tuple: (i, j, distância) - índices em pts1/pts2
+    """
+    best_i = -1
+    best_j = -1
+    min_sq = float("inf")
+    for i in range(pts1.shape[0]):
+        x1 = pts1[i, 0]
+        y1 = pts1[i, 1]
+        z1 = pts1[i, 2]
+        for j in range(pts2.shape[0]):
+            dx = pts2[j, 0] - x1
+            dy = pts2[j, 1] - y1
+            dz = pts2[j, 2] - z1
+            dist_sq = dx * dx + dy * dy + dz * dz
+            if dist_sq < min_sq:
+                min_sq = dist_sq
+                best_i = i
+                best_j = j
+    return best_i, best_j, sqrt(min_sq)
+
+
+if NUMBA_AVAILABLE:
+    _closest_pair_soa = njit(cache=True, fastmath=True)(_closest_pair_soa)
+
+
 def get_connector_closest_to(connectors, xyz_point):
     """Retorna o conector mais próximo de um ponto.
     
@@ -92,13 +226,26 @@ def get_connector_closest_to(connectors, xyz_point):
         >>> point = XYZ(0, 0, 0)
         >>> closest = get_connector_closest_to(pipe.ConnectorManager.Connectors, point)
     """
-    min_distance = float("inf")
+    connectors = list(connectors)
+    
+    if NUMPY_AVAILABLE and len(connectors) >= NUMPY_MIN_CONNECTORS:
+        conns, pts = connectors_to_soa(connectors)
+        diffs = pts - np.array([xyz_point.X, xyz_point.Y, xyz_point.Z])
+        return conns[int(np.einsum('ij,ij->i', diffs, diffs).argmin())]
+    
+    # Compara distâncias ao quadrado: só a ordem importa, sem sqrt
+    px, py, pz = xyz_point.X, xyz_point.Y, xyz_point.Z
+    min_sq = float("inf")
     closest_connector = None
     
     for connector in connectors:
-        distance = connector.Origin.DistanceTo(xyz_point)
-        if distance < min_distance:
-            min_distance = distance
+        origin = connector.Origin
+        dx = origin.X - px
+        dy = origin.Y - py
+        dz = origin.Z - pz
+        dist_sq = dx * dx + dy * dy + dz * dz
+        if dist_sq < min_sq:
+            min_sq = dist_sq
             closest_connector = connector
     
     return closest_connector
@@ -114,25 +261,154 @@ def find_closest_connector_pair(element1, element2, unused_only=True):
         
     Returns:
         tuple: (connector1, connector2, distance) ou (None, None, inf)
+        
+    Notes:
+        Com scipy disponível e muitos pares (equipamentos, manifolds), usa
+        cKDTree sobre as origens do segundo elemento: O((N+M)·logM) em vez
+        de N·M chamadas DistanceTo. Sem scipy, com numba, usa o kernel
+        compilado _closest_pair_soa.
     """
     cm1 = get_connector_manager(element1)
     cm2 = get_connector_manager(element2)
     
     # Selecionar tipo de conectores
-    connectors1 = cm1.UnusedConnectors if unused_only else cm1.Connectors
-    connectors2 = cm2.UnusedConnectors if unused_only else cm2.Connectors
+    connectors1 = list(cm1.UnusedConnectors if unused_only else cm1.Connectors)
+    connectors2 = list(cm2.UnusedConnectors if unused_only else cm2.Connectors)
+    
+    return _closest_pair_from_lists(connectors1, connectors2)
+
+
+def _closest_pair_from_lists(connectors1, connectors2):
+    """Par de conectores mais próximos entre duas listas já materializadas.
+    
+    Núcleo de find_closest_connector_pair, sem buscar ConnectorManager.
     
-    min_distance = float("inf")
+    Returns:
+        tuple: (connector1, connector2, distance) ou (None, None, inf)
+    """
+    if not connectors1 or not connectors2:
+        return None, None, float("inf")
+    
+    if SCIPY_AVAILABLE and len(connectors1) * len(connectors2) >= KDTREE_MIN_PAIRS:
+        connectors1, pts1 = connectors_to_soa(connectors1)
+        connectors2, pts2 = connectors_to_soa(connectors2)
+        tree = cKDTree(pts2, leafsize=8)
+        distances, indices = tree.query(pts1, k=1)
+        i = int(distances.argmin())
+        return connectors1[i], connectors2[int(indices[i])], float(distances[i])
+    
+    if NUMBA_AVAILABLE and len(connectors1) * len(connectors2) >= NUMBA_MIN_PAIRS:
+        connectors1, pts1 = connectors_to_soa(connectors1)
+        connectors2, pts2 = connectors_to_soa(connectors2)
+        i, j, distance = _closest_pair_soa(pts1, pts2)
+        return connectors1[i], connectors2[j], distance
+    
+    # Coordenadas lidas uma vez por conector, fora do loop interno
+    lst1 = [(c, o.X, o.Y, o.Z) for c, o in ((c, c.Origin) for c in connectors1)]
+    lst2 = [(c, o.X, o.Y, o.Z) for c, o in ((c, c.Origin) for c in connectors2)]
+    
+    # Compara distâncias ao quadrado; sqrt apenas uma vez no final
+    min_sq = float("inf")
     closest_pair = (None, None)
     
-    for conn1 in connectors1:
-        for conn2 in connectors2:
-            distance = conn1.Origin.DistanceTo(conn2.Origin)
-            if distance < min_distance:
-                min_distance = distance
+    for conn1, x1, y1, z1 in lst1:
+        for conn2, x2, y2, z2 in lst2:
+            dx = x2 - x1
+            dy = y2 - y1
+            dz = z2 - z1
+            dist_sq = dx * dx + dy * dy + dz * dz
+            if dist_sq < min_sq:
+                min_sq = dist_sq
                 closest_pair = (conn1, conn2)
     
-    return closest_pair[0], closest_pair[1], min_distance
+    return closest_pair[0], closest_pair[1], sqrt(min_sq)
+
+
+def find_connector_pairs_batch(elements, max_distance, unused_only=True):
+    """Encontra todos os pares de conectores próximos entre vários elementos.
+    
+    Substitui N² chamadas de find_closest_connector_pair (ex: auto-routing)
+    por uma única varredura sobre todos os conectores.
+    
+    Args:
+        elements: Lista de elementos MEP (não-MEP são ignorados)
+        max_distance: Distância máxima entre conectores (pés)
+        unused_only: Se True, considera apenas conectores não usados
+        
+    Returns:
+        list: Tuplas (connector1, connector2, distance) de elementos
+              diferentes, ordenadas por distância ([] se max_distance < 0)
+        
+    Examples:
+        >>> pairs = find_connector_pairs_batch(selected, 0.5)
+        >>> for conn1, conn2, dist in pairs:
+        ...     print(conn1.Owner.Id, conn2.Owner.Id, dist)
+        
+    Notes:
+        Com scipy usa cKDTree.query_pairs; sem scipy (IronPython) usa
+        hash espacial em células de lado max_distance.
+    """
+    if max_distance < 0:
+        return []
+    
+    connectors = []
+    owners = []
+    for index, element in enumerate(elements):
+        if not is_mep_element(element):
+            continue
+        cm = get_connector_manager(element)
+        for connector in (cm.UnusedConnectors if unused_only else cm.Connectors):
+            connectors.append(connector)
+            owners.append(index)
+    
+    connectors, pts = connectors_to_soa(connectors)
+    if not connectors:
+        return []
+    
+    pairs = []
+    
+    if SCIPY_AVAILABLE:
+        tree = cKDTree(pts)
+        for i, j in tree.query_pairs(max_distance, output_type='ndarray'):
+            i = int(i)
+            j = int(j)
+            if owners[i] != owners[j]:
+                diff = pts[i] - pts[j]
+                pairs.append((connectors[i], connectors[j], sqrt(float(diff.dot(diff)))))
+    else:
+        if NUMPY_AVAILABLE:
+            pts = pts.tolist()
+        
+        # Hash espacial: só compara conectores em células vizinhas
+        max_sq = max_distance * max_distance
+        cell = float(max_distance) if max_distance > 0 else 1.0
+        grid = {}
+        for i, (x, y, z) in enumerate(pts):
+            key = (int(x // cell), int(y // cell), int(z // cell))
+            grid.setdefault(key, []).append(i)
+        
+        offsets = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+        for (cx, cy, cz), members in grid.items():
+            for dx, dy, dz in offsets:
+                neighbours = grid.get((cx + dx, cy + dy, cz + dz))
+                if not neighbours:
+                    continue
+                for i in members:
+                    x1, y1, z1 = pts[i]
+                    for j in neighbours:
+                        # Cada par uma vez; mesmo dono não conta
+                        if j <= i or owners[i] == owners[j]:
+                            continue
+                        x2, y2, z2 = pts[j]
+                        ex = x2 - x1
+                        ey = y2 - y1
+                        ez = z2 - z1
+                        dist_sq = ex * ex + ey * ey + ez * ez
+                        if dist_sq <= max_sq:
+                            pairs.append((connectors[i], connectors[j], sqrt(dist_sq)))
+    
+    pairs.sort(key=lambda pair: pair[2])
+    return pairs
 
 
 def get_connector_direction(connector):
@@ -146,10 +422,21 @@ def get_connector_direction(connector):
     """
     try:
         return connector.CoordinateSystem.BasisZ
-    except AttributeError:
+    except (AttributeError, Exceptions.InvalidOperationException):
+        # Sem CoordinateSystem (ex: conector lógico)
         return None
 
 
+def _dir(connector):
+    """Direção do conector como tupla (x, y, z), ou None se não houver.
+    
+    Sem cache: conectores podem ser movidos/rotacionados por qualquer
+    operação (ElementTransformUtils, ConnectTo...) entre duas leituras.
+    """
+    basis = get_connector_direction(connector)
+    return None if basis is None else (basis.X, basis.Y, basis.Z)
+
+
 def calculate_connector_angle(conn1, conn2, in_degrees=False):
     """Calcula ângulo entre dois conectores.
     
@@ -163,13 +450,15 @@ def calculate_connector_angle(conn1, conn2, in_degrees=False):
         None: Se não conseguir calcular
     """
     try:
-        dir1 = get_connector_direction(conn1)
-        dir2 = get_connector_direction(conn2)
+        dir1 = _dir(conn1)
+        dir2 = _dir(conn2)
         
         if dir1 is None or dir2 is None:
             return None
         
-        angle = dir1.AngleTo(dir2)
+        # BasisZ é unitário: ângulo direto do produto escalar
+        dot = dir1[0] * dir2[0] + dir1[1] * dir2[1] + dir1[2] * dir2[2]
+        angle = acos(max(-1.0, min(1.0, dot)))
         
         if in_degrees:
             return degrees(angle)
@@ -208,63 +497,111 @@ def get_connector_domain_name(connector):
     Returns:
         str: Nome do domínio em português
     """
-    domain_names = {
-        Domain.DomainHvac: "HVAC (Ar Condicionado)",
-        Domain.DomainPiping: "Hidráulico (Tubulação)",
-        Domain.DomainElectrical: "Elétrico",
-        Domain.DomainCableTrayConduit: "Bandeja/Eletroduto"
-    }
-    
     try:
-        return domain_names.get(connector.Domain, "Desconhecido")
-    except:
+        return _DOMAIN_NAMES.get(connector.Domain, "Desconhecido")
+    except AttributeError:
         return "Indefinido"
 
 
-def validate_connector_compatibility(conn1, conn2):
-    """Valida se dois conectores podem ser conectados.
+def check_connector_compatibility(conn1, conn2):
+    """Verifica se dois conectores podem ser conectados, sem montar mensagem.
     
-    Verifica:
-    - Mesmo domínio
-    - Diâmetros compatíveis (com tolerância)
-    - Não já conectados entre si
+    Para loops que só precisam do bool (ex: filtrar candidatos): a mensagem
+    só é formatada depois, se necessário, com format_compat_error.
     
     Args:
         conn1: Primeiro conector
         conn2: Segundo conector
         
     Returns:
-        tuple: (bool is_compatible, str error_message)
+        tuple: (bool is_compatible, tuple error_code ou None)
+               error_code: ("domain_mismatch", domain1, domain2),
+               ("radius_mismatch", diam1, diam2) ou ("already_connected",)
+    
+    Examples:
+        >>> ok, code = check_connector_compatibility(conn1, conn2)
+        >>> if not ok:
+        ...     print(format_compat_error(code))
     """
-    # Verificar domínio
+    # Verificar domínio (só a leitura das propriedades fica no try)
     try:
-        if conn1.Domain != conn2.Domain:
-            return False, "Conectores de domínios diferentes ({} vs {})".format(
-                get_connector_domain_name(conn1),
-                get_connector_domain_name(conn2)
-            )
-    except:
-        pass  # Ignorar se não conseguir verificar domínio
-    
-    # Verificar se já conectados
-    if conn1.IsConnected and conn2.IsConnected:
-        for ref in conn1.AllRefs:
-            if ref.Owner.Id == conn2.Owner.Id:
-                return False, "Conectores já estão conectados entre si"
+        domain1 = conn1.Domain
+        domain2 = conn2.Domain
+    except AttributeError:
+        domain1 = domain2 = None  # Ignorar se não conseguir verificar domínio
+    
+    if domain1 != domain2:
+        return False, ("domain_mismatch", domain1, domain2)
     
-    # Verificar diâmetros (com 10% de tolerância)
+    # Verificar diâmetros (com 10% de tolerância) - antes de AllRefs, que é caro
     try:
         diam1 = conn1.Radius * 2
         diam2 = conn2.Radius * 2
+    except (AttributeError, Exceptions.InvalidOperationException):
+        diam1 = diam2 = None  # Conector não circular: ignorar diâmetros
+    
+    if diam1 is not None and abs(diam1 - diam2) > max(diam1, diam2) * 0.1:
+        return False, ("radius_mismatch", diam1, diam2)
+    
+    # Verificar se já conectados (percorre AllRefs só se ambos conectados
+    # e de donos diferentes)
+    if conn1.IsConnected and conn2.IsConnected:
+        owner2_id = conn2.Owner.Id
+        if conn1.Owner.Id != owner2_id:
+            for ref in conn1.AllRefs:
+                if ref.Owner.Id == owner2_id:
+                    return False, ("already_connected",)
+    
+    return True, None
+
+
+def format_compat_error(error_code):
+    """Formata o código de erro de check_connector_compatibility.
+    
+    Args:
+        error_code: Tupla retornada por check_connector_compatibility
         
-        if abs(diam1 - diam2) > max(diam1, diam2) * 0.1:
-            return False, "Diâmetros incompatíveis ({:.2f}\" vs {:.2f}\")".format(
-                diam1 * 12, diam2 * 12  # Converter pés para polegadas
-            )
-    except:
-        pass  # Ignorar se não conseguir verificar diâmetros
+    Returns:
+        str: Mensagem legível ("" se error_code for None)
+    """
+    if error_code is None:
+        return ""
+    
+    kind = error_code[0]
+    if kind == "domain_mismatch":
+        return "Conectores de domínios diferentes ({} vs {})".format(
+            _DOMAIN_NAMES.get(error_code[1], "Desconhecido"),
+            _DOMAIN_NAMES.get(error_code[2], "Desconhecido")
+        )
+    if kind == "radius_mismatch":
+        return "Diâmetros incompatíveis ({:.2f}\" vs {:.2f}\")".format(
+            error_code[1] * 12, error_code[2] * 12  # Converter pés para polegadas
+        )
+    if kind == "already_connected":
+        return "Conectores já estão conectados entre si"
+    return "Conectores incompatíveis"
+
+
+def validate_connector_compatibility(conn1, conn2):
+    """Valida se dois conectores podem ser conectados.
+    
+    Verifica:
+    - Mesmo domínio
+    - Diâmetros compatíveis (com tolerância)
+    - Não já conectados entre si
     
-    return True, ""
+    Args:
+        conn1: Primeiro conector
+        conn2: Segundo conector
+        
+    Returns:
+        tuple: (bool is_compatible, str error_message)
+        
+    Notes:
+        Se só o bool interessa, usar check_connector_compatibility.
+    """
+    compatible, error_code = check_connector_compatibility(conn1, conn2)
+    return compatible, format_compat_error(error_code)
 
 
 # ==================== ELEMENT UTILITIES ====================
@@ -287,6 +624,27 @@ def get_element_endpoints(element):
     return None, None
 
 
+def get_curve_geometry(element):
+    """Retorna pontos extremos e comprimento de um MEPCurve em uma chamada.
+    
+    Para fluxos que precisam dos dois (ex: medições): lê Location e Curve
+    uma única vez, em vez de get_element_endpoints + get_element_length.
+    
+    Args:
+        element: MEPCurve (Pipe, Duct, etc)
+        
+    Returns:
+        tuple: (XYZ start, XYZ end, float length) ou (None, None, None)
+    """
+    location = element.Location
+    
+    if isinstance(location, LocationCurve):
+        curve = location.Curve
+        return curve.GetEndPoint(0), curve.GetEndPoint(1), curve.Length
+    
+    return None, None, None
+
+
 def get_element_midpoint(element):
     """Retorna ponto médio de um MEPCurve.
     
@@ -396,9 +754,7 @@ def create_elbow_fitting(conn1, conn2, doc):
     try:
         fitting = doc.Create.NewElbowFitting(conn1, conn2)
         return fitting
-    except Exceptions.InvalidOperationException:
-        return None
-    except Exception:
+    except (Exceptions.InvalidOperationException, Exceptions.ArgumentException):
         return None
 
 
@@ -417,9 +773,7 @@ def create_tee_fitting(conn1, conn2, conn3, doc):
     try:
         fitting = doc.Create.NewTeeFitting(conn1, conn2, conn3)
         return fitting
-    except Exceptions.InvalidOperationException:
-        return None
-    except Exception:
+    except (Exceptions.InvalidOperationException, Exceptions.ArgumentException):
         return None
 
 
@@ -437,9 +791,7 @@ def create_union_fitting(conn1, conn2, doc):
     try:
         fitting = doc.Create.NewUnionFitting(conn1, conn2)
         return fitting
-    except Exceptions.InvalidOperationException:
-        return None
-    except Exception:
+    except (Exceptions.InvalidOperationException, Exceptions.ArgumentException):
         return None
 
 
@@ -457,10 +809,51 @@ def create_transition_fitting(conn1, conn2, doc):
     try:
         fitting = doc.Create.NewTransitionFitting(conn1, conn2)
         return fitting
-    except Exceptions.InvalidOperationException:
+    except (Exceptions.InvalidOperationException, Exceptions.ArgumentException):
         return None
+
+
+def create_fittings_batch(specs, doc):
+    """Cria vários fittings dentro de uma única SubTransaction.
+    
+    IMPORTANTE: Deve ser chamada dentro de uma Transaction ativa.
+    
+    Agrupa N criações (ex: auto-routing) em um só bloco: um Commit/RollBack
+    para o lote em vez de tratar cada fitting isoladamente.
+    
+    Args:
+        specs: Lista de tuplas (tipo, conn1, conn2[, conn3]), com tipo em
+               'elbow', 'tee', 'union', 'transition' ou 'auto'
+        doc: Document
+        
+    Returns:
+        list: Fitting criado (ou None) para cada spec, na mesma ordem
+        
+    Raises:
+        ValueError: Se algum tipo for desconhecido (nada é criado)
+        
+    Examples:
+        >>> with Transaction(doc, "Fittings") as t:
+        ...     t.Start()
+        ...     fittings = create_fittings_batch([('elbow', c1, c2), ('union', c3, c4)], doc)
+        ...     t.Commit()
+    """
+    for spec in specs:
+        if spec[0] not in _FITTING_CREATORS:
+            raise ValueError("Tipo de fitting desconhecido: '{}'".format(spec[0]))
+    
+    results = []
+    sub = SubTransaction(doc)
+    sub.Start()
+    try:
+        for spec in specs:
+            results.append(_FITTING_CREATORS[spec[0]](*(tuple(spec[1:]) + (doc,))))
+        sub.Commit()
     except Exception:
-        return None
+        sub.RollBack()
+        raise
+    
+    return results
 
 
 def create_appropriate_fitting(conn1, conn2, doc):
@@ -478,18 +871,20 @@ def create_appropriate_fitting(conn1, conn2, doc):
     Returns:
         FamilyInstance ou None: Fitting criado, ou None se conexão direta
     """
-    angle = calculate_connector_angle(conn1, conn2)
+    dir1 = _dir(conn1)
+    dir2 = _dir(conn2)
     
-    if angle is None:
+    if dir1 is None or dir2 is None:
         # Tentar conexão direta
         try:
             conn1.ConnectTo(conn2)
-            return None
-        except:
-            return None
+        except Exception:
+            pass
+        return None
     
-    # Cotovelo: 10° a 170° (0.175 a 2.967 radianos)
-    if 0.175 < angle < 2.967:
+    # Cotovelo: 10° a 170° <=> |cos| < cos(10°) (sem acos)
+    dot = abs(dir1[0] * dir2[0] + dir1[1] * dir2[1] + dir1[2] * dir2[2])
+    if dot < COS_10:
         fitting = create_elbow_fitting(conn1, conn2, doc)
         if fitting:
             return fitting
@@ -502,12 +897,22 @@ def create_appropriate_fitting(conn1, conn2, doc):
     # Fallback: conexão direta
     try:
         conn1.ConnectTo(conn2)
-    except:
+    except Exception:
         pass
     
     return None
 
 
+# Despacho de create_fittings_batch por tipo
+_FITTING_CREATORS = {
+    'elbow': create_elbow_fitting,
+    'tee': create_tee_fitting,
+    'union': create_union_fitting,
+    'transition': create_transition_fitting,
+    'auto': create_appropriate_fitting,
+}
+
+
 # ==================== GEOMETRY UTILITIES ====================
 
 def calculate_rotation_axis(direction1, direction2):
@@ -524,24 +929,24 @@ def calculate_rotation_axis(direction1, direction2):
         # Se paralelos mesma direção, usar perpendicular
         angle = direction1.AngleTo(direction2)
         
-        if angle == 0:
+        if angle < 1e-9:
             # Usar eixo perpendicular arbitrário
             if abs(direction1.Z) < 0.9:
-                return XYZ.BasisZ
+                return _BASIS_Z
             else:
-                return XYZ.BasisX
+                return _BASIS_X
         
         # Cross product para eixo perpendicular
         axis = direction1.CrossProduct(direction2)
         
-        # Normalizar
-        length = axis.GetLength()
-        if length < 0.001:
+        # Normalizar (comprimento² < 0.001², sem sqrt)
+        if axis.DotProduct(axis) < 1e-6:
             return None
         
         return axis.Normalize()
     
-    except:
+    except (AttributeError, Exceptions.ArgumentException):
+        # Não é XYZ, ou vetor de comprimento zero
         return None
 
 
@@ -568,9 +973,7 @@ def points_distance_horizontal(point1, point2):
     Returns:
         float: Distância horizontal em pés
     """
-    dx = point2.X - point1.X
-    dy = point2.Y - point1.Y
-    return sqrt(dx * dx + dy * dy)
+    return hypot(point2.X - point1.X, point2.Y - point1.Y)
 
 
 # ==================== TYPE/SYSTEM UTILITIES ====================
@@ -586,19 +989,15 @@ def get_mep_system(element):
     """
     try:
         # Para MEPCurve
-        if hasattr(element, 'MEPSystem'):
-            return element.MEPSystem
+        system = getattr(element, 'MEPSystem', None)
+        if system is not None:
+            return system
         
         # Para FamilyInstance
-        if hasattr(element, 'MEPModel'):
-            mep_model = element.MEPModel
-            if mep_model and hasattr(mep_model, 'MEPSystem'):
-                return mep_model.MEPSystem
-    
-    except:
-        pass
+        return getattr(getattr(element, 'MEPModel', None), 'MEPSystem', None)
     
-    return None
+    except Exceptions.InvalidOperationException:
+        return None
 
 
 def get_element_type_name(element):
@@ -614,7 +1013,7 @@ def get_element_type_name(element):
         element_type = element.Document.GetElement(element.GetTypeId())
         if element_type:
             return element_type.Name
-    except:
+    except AttributeError:
         pass
     
     return "Unknown"
@@ -631,11 +1030,9 @@ def is_mep_element(element):
     Returns:
         bool: True se é MEP
     """
-    try:
-        get_connector_manager(element)
-        return True
-    except AttributeError:
-        return False
+    # Sonda direta: sem lançar/capturar AttributeError no caso comum (não-MEP)
+    return (getattr(element, 'ConnectorManager', None) is not None or
+            getattr(getattr(element, 'MEPModel', None), 'ConnectorManager', None) is not None)
 
 
 def can_elements_connect(element1, element2):
@@ -655,18 +1052,18 @@ def can_elements_connect(element1, element2):
     if not is_mep_element(element2):
         return False, "Segundo elemento não é MEP"
     
-    # Verificar se têm conectores disponíveis
-    unused1 = get_unused_connectors(element1)
-    unused2 = get_unused_connectors(element2)
-    
+    # Verificar se têm conectores disponíveis (um acesso ao manager cada;
+    # o segundo só é percorrido se o primeiro tiver conectores livres)
+    unused1 = list(iter_unused_connectors(element1))
     if not unused1:
         return False, "Primeiro elemento não tem conectores disponíveis"
     
+    unused2 = list(iter_unused_connectors(element2))
     if not unused2:
         return False, "Segundo elemento não tem conectores disponíveis"
     
-    # Encontrar conectores mais próximos e validar
-    conn1, conn2, distance = find_closest_connector_pair(element1, element2)
+    # Encontrar conectores mais próximos e validar (listas já obtidas)
+    conn1, conn2, distance = _closest_pair_from_lists(unused1, unused2)
     
     if conn1 is None or conn2 is None:
         return False, "Não foi possível encontrar conectores compatíveis"
@@ -23,14 +23,76 @@ USAGE:
         print("Copiado com sucesso!")
 
 DEPENDENCIES:
-    - Autodesk.Revit.DB (StorageType, ElementId)
+    - Autodesk.Revit.DB (StorageType, ElementId, SubTransaction)
 
 AUTHOR: Thiago Barreto
 VERSION: 1.0
 CONSOLIDATED FROM: Copy Parameters.pushbutton + Copy N EDIT.pushbutton
 """
 
-from Autodesk.Revit.DB import StorageType, ElementId
+from collections import namedtuple
+
+from Autodesk.Revit.DB import StorageType, ElementId, SubTransaction
+
+
+def _coerce_element_id(value):
+    """ElementId a gravar (None/vazio vira InvalidElementId)."""
+    # ElementId pode ser InvalidElementId
+    if value and value != ElementId.InvalidElementId:
+        return value
+    return ElementId.InvalidElementId
+
+
+def _set_element_id(parameter, value):
+    """Define ElementId (None/vazio vira InvalidElementId)."""
+    return parameter.Set(_coerce_element_id(value))
+
+
+# Leitura/escrita por StorageType - um lookup em vez de cadeia if/elif
+_READERS = {
+    StorageType.String: lambda p: p.AsString(),
+    StorageType.Double: lambda p: p.AsDouble(),
+    StorageType.Integer: lambda p: p.AsInteger(),
+    StorageType.ElementId: lambda p: p.AsElementId(),
+}
+
+_WRITERS = {
+    StorageType.String: lambda p, v: p.Set(v or ""),
+    StorageType.Double: lambda p, v: p.Set(float(v)),
+    StorageType.Integer: lambda p, v: p.Set(int(v)),
+    StorageType.ElementId: _set_element_id,
+}
+
+# Conversão do valor para o tipo de Set() - aplicada uma vez por parâmetro
+# no plano de batch_copy_parameters, não a cada escrita
+_COERCERS = {
+    StorageType.String: lambda v: v or "",
+    StorageType.Double: float,
+    StorageType.Integer: int,
+    StorageType.ElementId: _coerce_element_id,
+}
+
+
+def _lookup_parameter(element, param_name):
+    """Primeiro parâmetro com o nome dado (ou None).
+
+    GetParameters(nome) evita o custo de LookupParameter, que monta as
+    Definitions de todos os parâmetros do elemento.
+    """
+    params = element.GetParameters(param_name)
+    return params[0] if params.Count else None
+
+
+def _set_coerced(parameter, value):
+    """Set() de valor já convertido (ver _COERCERS), sem despacho por tipo."""
+    if parameter.IsReadOnly:
+        return False
+
+    try:
+        parameter.Set(value)
+        return True
+    except Exception:
+        return False
 
 
 def get_parameter_value_safe(parameter):
@@ -55,29 +117,20 @@ def get_parameter_value_safe(parameter):
     if not parameter:
         return None, None, False
 
-    if not parameter.HasValue:
-        return None, parameter.StorageType if hasattr(parameter, 'StorageType') else None, False
-
     storage_type = parameter.StorageType
 
-    try:
-        if storage_type == StorageType.String:
-            return parameter.AsString(), storage_type, True
-
-        elif storage_type == StorageType.Double:
-            return parameter.AsDouble(), storage_type, True
-
-        elif storage_type == StorageType.Integer:
-            return parameter.AsInteger(), storage_type, True
+    if not parameter.HasValue:
+        return None, storage_type, False
 
-        elif storage_type == StorageType.ElementId:
-            return parameter.AsElementId(), storage_type, True
+    reader = _READERS.get(storage_type)
+    if reader is None:
+        # Tipo não suportado
+        return None, storage_type, False
 
-        else:
-            # Tipo não suportado
-            return None, storage_type, False
+    try:
+        return reader(parameter), storage_type, True
 
-    except Exception as e:
+    except Exception:
         # Erro ao ler valor
         return None, storage_type, False
 
@@ -106,35 +159,23 @@ def set_parameter_value_safe(parameter, value, storage_type):
     if parameter.IsReadOnly:
         return False
 
-    try:
-        if storage_type == StorageType.String:
-            parameter.Set(value if value else "")
-            return True
-
-        elif storage_type == StorageType.Double:
-            parameter.Set(float(value))
-            return True
+    writer = _WRITERS.get(storage_type)
+    if writer is None:
+        return False
 
-        elif storage_type == StorageType.Integer:
-            parameter.Set(int(value))
-            return True
+    try:
+        writer(parameter, value)
+        return True
 
-        elif storage_type == StorageType.ElementId:
-            # ElementId pode ser InvalidElementId
-            if value and value != ElementId.InvalidElementId:
-                parameter.Set(value)
-            else:
-                parameter.Set(ElementId.InvalidElementId)
-            return True
+    except Exception:
+        return False
 
-        else:
-            return False
 
-    except Exception as e:
-        return False
+# Resultado de copy_parameter_value(..., as_tuple=True)
+CopyResult = namedtuple('CopyResult', 'success reason value storage_type')
 
 
-def copy_parameter_value(source_element, target_element, param_name):
+def copy_parameter_value(source_element, target_element, param_name, as_tuple=False):
     """
     Copia valor de um parâmetro de um elemento origem para um destino.
 
@@ -148,6 +189,8 @@ def copy_parameter_value(source_element, target_element, param_name):
         source_element (Element): Elemento origem
         target_element (Element): Elemento destino
         param_name (str): Nome do parâmetro a copiar
+        as_tuple (bool): Se True, retorna CopyResult (namedtuple, sem dict
+            por chamada) em vez do dict
 
     Returns:
         dict: Resultado da operação com chaves:
@@ -155,6 +198,7 @@ def copy_parameter_value(source_element, target_element, param_name):
             - 'reason' (str): Descrição do resultado
             - 'value': Valor copiado (se success=True)
             - 'storage_type' (StorageType): Tipo do parâmetro (se success=True)
+        CopyResult: Mesmos campos como atributos, se as_tuple=True
 
     Example:
         >>> result = copy_parameter_value(wall1, wall2, "Mark")
@@ -163,64 +207,90 @@ def copy_parameter_value(source_element, target_element, param_name):
         ... else:
         ...     print("Erro: {}".format(result['reason']))
     """
-    result = {
-        'success': False,
-        'reason': '',
-        'value': None,
-        'storage_type': None
-    }
+    result = _copy_parameter_value(source_element, target_element, param_name)
+    if as_tuple:
+        return result
+    return dict(zip(CopyResult._fields, result))
 
+
+def _copy_parameter_value(source_element, target_element, param_name):
+    """Núcleo de copy_parameter_value; retorna CopyResult."""
     try:
         # Obter parâmetro fonte
         source_param = source_element.LookupParameter(param_name)
         if not source_param:
-            result['reason'] = 'Parâmetro não encontrado no elemento origem'
-            return result
-
-        if not source_param.HasValue:
-            result['reason'] = 'Parâmetro origem não tem valor'
-            return result
+            return CopyResult(False, 'Parâmetro não encontrado no elemento origem', None, None)
 
         # Obter parâmetro destino
         target_param = target_element.LookupParameter(param_name)
         if not target_param:
-            result['reason'] = 'Parâmetro não encontrado no elemento destino'
-            return result
+            return CopyResult(False, 'Parâmetro não encontrado no elemento destino', None, None)
 
-        if target_param.IsReadOnly:
-            result['reason'] = 'Parâmetro destino é somente leitura'
-            return result
-
-        # Validar compatibilidade de tipos
-        if source_param.StorageType != target_param.StorageType:
-            result['reason'] = 'Tipos de armazenamento incompatíveis (origem: {}, destino: {})'.format(
-                source_param.StorageType, target_param.StorageType
-            )
-            return result
+        # Valor, somente leitura e tipos: validação única
+        compatible, reason = validate_parameter_compatibility(source_param, target_param)
+        if not compatible:
+            return CopyResult(False, reason, None, None)
 
         # Obter valor origem
         value, storage_type, success = get_parameter_value_safe(source_param)
         if not success:
-            result['reason'] = 'Erro ao ler valor do parâmetro origem'
-            return result
+            return CopyResult(False, 'Erro ao ler valor do parâmetro origem', None, None)
 
         # Definir valor no destino
         success = set_parameter_value_safe(target_param, value, storage_type)
         if not success:
-            result['reason'] = 'Erro ao escrever valor no parâmetro destino'
-            return result
+            return CopyResult(False, 'Erro ao escrever valor no parâmetro destino', None, None)
 
         # Sucesso
-        result['success'] = True
-        result['reason'] = 'Copiado com sucesso'
-        result['value'] = value
-        result['storage_type'] = storage_type
-
-        return result
+        return CopyResult(True, 'Copiado com sucesso', value, storage_type)
 
     except Exception as e:
-        result['reason'] = 'Erro inesperado: {}'.format(str(e))
-        return result
+        return CopyResult(False, 'Erro inesperado: {}'.format(str(e)), None, None)
+
+
+def make_copy_plan(param_name):
+    """
+    Cria função de cópia especializada para um parâmetro fixo.
+
+    Para loops sobre muitos pares de elementos com o mesmo esquema: o tipo
+    de armazenamento é resolvido na primeira cópia bem-sucedida e as
+    seguintes chamam leitor/escritor direto, sem despacho por StorageType.
+
+    Args:
+        param_name (str): Nome do parâmetro a copiar
+
+    Returns:
+        function: copy(source_element, target_element) -> bool
+
+    Example:
+        >>> copy_mark = make_copy_plan("Mark")
+        >>> copiados = sum(1 for src, tgt in pares if copy_mark(src, tgt))
+    """
+    plano = []  # [reader, writer, storage_type] após a primeira cópia
+
+    def copy(source_element, target_element):
+        source_param = _lookup_parameter(source_element, param_name)
+        if source_param is None or not source_param.HasValue:
+            return False
+
+        target_param = _lookup_parameter(target_element, param_name)
+        if target_param is None or target_param.IsReadOnly:
+            return False
+
+        if not plano:
+            storage_type = source_param.StorageType
+            if storage_type != target_param.StorageType or storage_type not in _READERS:
+                return False
+            plano.extend((_READERS[storage_type], _WRITERS[storage_type], storage_type))
+
+        try:
+            # Parameter.Set retorna False se o valor não foi aceito
+            return plano[1](target_param, plano[0](source_param)) is not False
+        except Exception:
+            # Esquema diferente do primeiro par (ex: outro StorageType)
+            return False
+
+    return copy
 
 
 def validate_parameter_compatibility(source_param, target_param):
@@ -278,9 +348,7 @@ def get_parameter_storage_type(parameter):
         ...     print("Parâmetro é texto")
     """
     try:
-        if parameter and hasattr(parameter, 'StorageType'):
-            return parameter.StorageType
-        return None
+        return parameter.StorageType if parameter else None
     except:
         return None
 
@@ -329,98 +397,253 @@ def format_parameter_value(value, storage_type):
         return "(erro ao formatar)"
 
 
-def batch_copy_parameters(source_element, target_elements, param_names):
+def _build_source_plan(source_element, param_names):
+    """
+    Lê e converte os valores de origem (param_name -> valor pronto para Set).
+
+    Leitura sequencial de propósito: a API do Revit não é thread-safe (nem
+    para leitura) fora do contexto de API, então não usar Parallel.ForEach
+    aqui. Nomes repetidos em param_names são lidos uma única vez.
+    """
+    plan = {}
+    lidos = set()
+    for param_name in param_names:
+        if param_name in lidos:
+            continue
+        lidos.add(param_name)
+
+        param = _lookup_parameter(source_element, param_name)
+        if param:
+            value, storage_type, success = get_parameter_value_safe(param)
+            coerce = _COERCERS.get(storage_type)
+            if success and coerce is not None:
+                try:
+                    plan[param_name] = coerce(value)
+                except (TypeError, ValueError):
+                    pass
+    return plan
+
+
+# Motivos de falha registrados em stats['details']
+_MOTIVO_SEM_VALOR = 'Origem não possui valor para este parâmetro'
+_MOTIVO_NAO_ENCONTRADO = 'Parâmetro não encontrado no destino'
+_MOTIVO_FALHA_SET = 'Falha ao definir valor (pode ser somente leitura)'
+_MOTIVO_SOMENTE_LEITURA = 'Parâmetro somente leitura (verificado no primeiro destino)'
+
+
+def _target_records(target_element, param_names, plan):
+    """Copia os valores do plano para um destino; retorna os registros."""
+    records = []
+    target_id = target_element.Id
+
+    for param_name in param_names:
+        # Pular se parâmetro não está no plano (origem não tinha valor)
+        if param_name not in plan:
+            records.append((target_id, param_name, False, _MOTIVO_SEM_VALOR))
+            continue
+
+        value = plan[param_name]
+
+        # Obter parâmetro destino
+        target_param = _lookup_parameter(target_element, param_name)
+        if not target_param:
+            records.append((target_id, param_name, False, _MOTIVO_NAO_ENCONTRADO))
+            continue
+
+        # Tentar definir valor
+        if _set_coerced(target_param, value):
+            records.append((target_id, param_name, True, value))
+        else:
+            records.append((target_id, param_name, False, _MOTIVO_FALHA_SET))
+
+    return records
+
+
+def _readonly_names(first_target, param_names):
+    """Nomes somente leitura no primeiro destino."""
+    readonly = set()
+    for param_name in param_names:
+        param = _lookup_parameter(first_target, param_name)
+        if param is not None and param.IsReadOnly:
+            readonly.add(param_name)
+    return readonly
+
+
+def details_as_dicts(details):
+    """
+    Converte stats['details'] de batch_copy_parameters para dicionários.
+
+    Args:
+        details (list): Tuplas (target_id, param_name, success, valor_ou_motivo)
+
+    Returns:
+        generator: Dicts {'target_id', 'param_name', 'success', 'value'|'reason'}
+
+    Example:
+        >>> for d in details_as_dicts(stats['details']):
+        ...     if not d['success']:
+        ...         print(d['param_name'], d['reason'])
+    """
+    for target_id, param_name, success, extra in details:
+        yield {
+            'target_id': target_id,
+            'param_name': param_name,
+            'success': success,
+            'value' if success else 'reason': extra
+        }
+
+
+def batch_copy_parameters_stream(source_element, target_elements, param_names,
+                                 transaction=None, commit_every=50,
+                                 readonly_from_first=False):
+    """
+    Versão em fluxo de batch_copy_parameters: gera um registro por operação.
+
+    Nada é acumulado (memória constante em lotes de 100k+ operações); útil
+    para gravar log enquanto copia. Com Transaction, os registros de um
+    destino só são gerados após o Commit da SubTransaction dele.
+
+    Args:
+        Os mesmos de batch_copy_parameters()
+
+    Yields:
+        tuple: (target_id, param_name, success, valor_copiado_ou_motivo)
+
+    Example:
+        >>> for target_id, name, ok, extra in batch_copy_parameters_stream(src, targets, params):
+        ...     if not ok:
+        ...         log.write(u"{} {} {}\n".format(target_id, name, extra))
+    """
+    # PLANO: Ler e converter valores de origem uma única vez
+    plan = _build_source_plan(source_element, param_names)
+
+    # Origem sem nenhum valor: resultado já conhecido, sem tocar os destinos
+    if not plan:
+        for target_element in target_elements:
+            target_id = target_element.Id
+            for param_name in param_names:
+                yield (target_id, param_name, False, _MOTIVO_SEM_VALOR)
+        return
+
+    # Somente leitura verificado uma vez, no primeiro destino
+    if readonly_from_first and target_elements:
+        readonly = _readonly_names(target_elements[0], param_names)
+        if readonly:
+            for target_element in target_elements:
+                target_id = target_element.Id
+                for param_name in param_names:
+                    if param_name in readonly:
+                        yield (target_id, param_name, False, _MOTIVO_SOMENTE_LEITURA)
+            param_names = [n for n in param_names if n not in readonly]
+            if not param_names:
+                return
+
+    # Sem Transaction do chamador: copiar direto
+    if transaction is None:
+        for target_element in target_elements:
+            for record in _target_records(target_element, param_names, plan):
+                yield record
+        return
+
+    # Com Transaction: SubTransaction por destino + Commits periódicos
+    doc = source_element.Document
+    pendentes = 0
+
+    for target_element in target_elements:
+        sub = SubTransaction(doc)
+        sub.Start()
+
+        try:
+            records = _target_records(target_element, param_names, plan)
+            sub.Commit()
+        except Exception as e:
+            sub.RollBack()
+            target_id = target_element.Id
+            motivo = 'Destino revertido: {}'.format(e)
+            records = [(target_id, param_name, False, motivo) for param_name in param_names]
+        else:
+            pendentes += 1
+            if commit_every and pendentes >= commit_every:
+                transaction.Commit()
+                transaction.Start()
+                pendentes = 0
+
+        for record in records:
+            yield record
+
+
+def batch_copy_parameters(source_element, target_elements, param_names,
+                          transaction=None, commit_every=50,
+                          readonly_from_first=False, collect_details=True):
     """
     Copia múltiplos parâmetros para múltiplos elementos de uma vez.
 
-    OTIMIZAÇÃO: Faz cache dos valores de origem para evitar leituras repetidas.
+    OTIMIZAÇÃO: Faz cache dos valores de origem para evitar leituras repetidas
+    e busca parâmetros com GetParameters (mais barato que LookupParameter).
 
     Args:
         source_element (Element): Elemento origem
         target_elements (list): Lista de elementos destino
         param_names (list): Lista de nomes de parâmetros a copiar
+        transaction (Transaction): Transaction ativa do chamador (opcional).
+            Se informada, cada destino roda em uma SubTransaction (erro
+            inesperado reverte só aquele destino) e a Transaction é
+            confirmada e reiniciada a cada commit_every destinos
+        commit_every (int): Destinos por Commit intermediário (0 = nunca)
+        readonly_from_first (bool): Se True, parâmetros somente leitura no
+            primeiro destino são dados como somente leitura em todos, sem
+            consultar os demais. Usar apenas com destinos homogêneos (mesma
+            família/tipo, fora de grupos)
+        collect_details (bool): Se False, 'details' fica vazio e só os
+            contadores são mantidos (ver batch_copy_parameters_stream)
 
     Returns:
         dict: Estatísticas da operação:
             - 'total_operations': Total de operações tentadas
             - 'success_count': Quantidade de cópias bem-sucedidas
             - 'failed_count': Quantidade de cópias falhadas
-            - 'details': Lista de resultados detalhados
+            - 'details': Lista de tuplas (target_id, param_name, success,
+              valor_copiado_ou_motivo); ver details_as_dicts()
 
     Example:
         >>> targets = [wall1, wall2, wall3]
         >>> params = ["Mark", "Comments", "WBS"]
         >>> stats = batch_copy_parameters(source_wall, targets, params)
         >>> print("Sucesso: {}/{}".format(stats['success_count'], stats['total_operations']))
+
+        >>> # Lotes grandes: Commit a cada 50 destinos
+        >>> with Transaction(doc, "Copiar") as t:
+        ...     t.Start()
+        ...     stats = batch_copy_parameters(source_wall, targets, params, transaction=t)
+        ...     t.Commit()
     """
-    stats = {
+    details = []
+    success_count = 0
+    total = 0
+
+    stream = batch_copy_parameters_stream(
+        source_element, target_elements, param_names,
+        transaction=transaction, commit_every=commit_every,
+        readonly_from_first=readonly_from_first
+    )
+
+    if collect_details:
+        details.extend(stream)
+        total = len(details)
+        success_count = sum(1 for record in details if record[2])
+    else:
+        for record in stream:
+            total += 1
+            if record[2]:
+                success_count += 1
+
+    return {
         'total_operations': len(target_elements) * len(param_names),
-        'success_count': 0,
-        'failed_count': 0,
-        'details': []
+        'success_count': success_count,
+        'failed_count': total - success_count,
+        'details': details
     }
 
-    # CACHE: Ler valores de origem uma única vez
-    source_cache = {}
-    for param_name in param_names:
-        # IronPython geralmente já trata strings como unicode
-        # Mas garantir que estamos passando string correta
-        param = source_element.LookupParameter(param_name)
-        if param:
-            value, storage_type, success = get_parameter_value_safe(param)
-            if success:
-                source_cache[param_name] = (value, storage_type)
-
-    # Copiar para todos os destinos
-    for target_element in target_elements:
-        for param_name in param_names:
-            # Pular se parâmetro não estava no cache (origem não tinha valor)
-            if param_name not in source_cache:
-                stats['failed_count'] += 1
-                stats['details'].append({
-                    'target_id': target_element.Id,
-                    'param_name': param_name,
-                    'success': False,
-                    'reason': 'Origem não possui valor para este parâmetro'
-                })
-                continue
-
-            value, storage_type = source_cache[param_name]
-
-            # Obter parâmetro destino
-            target_param = target_element.LookupParameter(param_name)
-            if not target_param:
-                stats['failed_count'] += 1
-                stats['details'].append({
-                    'target_id': target_element.Id,
-                    'param_name': param_name,
-                    'success': False,
-                    'reason': 'Parâmetro não encontrado no destino'
-                })
-                continue
-
-            # Tentar definir valor
-            success = set_parameter_value_safe(target_param, value, storage_type)
-
-            if success:
-                stats['success_count'] += 1
-                stats['details'].append({
-                    'target_id': target_element.Id,
-                    'param_name': param_name,
-                    'success': True,
-                    'value': value
-                })
-            else:
-                stats['failed_count'] += 1
-                stats['details'].append({
-                    'target_id': target_element.Id,
-                    'param_name': param_name,
-                    'success': False,
-                    'reason': 'Falha ao definir valor (pode ser somente leitura)'
-                })
-
-    return stats
-
 
 # TESTES UNITÁRIOS (executar apenas quando módulo é executado diretamente)
 if __name__ == '__main__':
@@ -19,7 +19,7 @@ USAGE:
 
 DEPENDENCIES:
     - Snippets.core._revit_version_helpers (obter_tipo_parametro, obter_parameter_group)
-    - tempfile, codecs, os, datetime, uuid
+    - tempfile, codecs, os, uuid
 
 AUTHOR: Thiago Barreto
 VERSION: 1.0
@@ -28,12 +28,50 @@ VERSION: 1.0
 import codecs
 import os
 import tempfile
-from datetime import datetime
 import uuid
 
 from Snippets.core._revit_version_helpers import obter_tipo_parametro, obter_parameter_group
 
 
+# Tipos aceitos -> DATATYPE do arquivo (Revit 2024+ usa nomes modernos)
+_DATATYPE_MAP = {
+    'TEXT': 'TEXT',
+    'NUMBER': 'NUMBER',
+    'INTEGER': 'INTEGER',
+    'LENGTH': 'LENGTH',
+    'AREA': 'AREA',
+    'VOLUME': 'VOLUME',
+    'ANGLE': 'ANGLE',
+    'YESNO': 'YESNO',
+    'URL': 'URL',
+}
+
+# Linha PARAM: GUID, NAME, DATATYPE, DATACATEGORY, GROUP=1, VISIBLE, DESCRIPTION, USERMODIFIABLE
+_PARAM_LINE_TMPL = "PARAM\t%s\t%s\t%s\t%s\t1\t%s\t%s\t%s\n"
+
+# Cabeçalho padrão Revit do arquivo de parâmetros compartilhados
+_CABECALHO = (
+    "# This is a Revit shared parameter file.\n"
+    "# Do not edit manually when editing in Revit\n"
+    "*META\tVERSION\tMINVERSION\n"
+    "META\t2\t1\n"
+    "*GROUP\tID\tNAME\n"
+    "GROUP\t1\tParametros Customizados\n"
+    "*PARAM\tGUID\tNAME\tDATATYPE\tDATACATEGORY\tGROUP\tVISIBLE\tDESCRIPTION\tUSERMODIFIABLE\n"
+)
+
+
+def _caminho_temporario(nome_script):
+    """Cria arquivo temporário vazio e único para nome_script; retorna o caminho.
+
+    mkstemp garante nome único (timestamp por segundo colidia em chamadas
+    seguidas) e cria o arquivo atomicamente.
+    """
+    fd, caminho = tempfile.mkstemp(prefix="CoordRevit_{}_".format(nome_script), suffix=".txt")
+    os.close(fd)
+    return caminho
+
+
 def criar_arquivo_parametros_temporario(nome_script="PyRevit"):
     """
     Cria arquivo temporário de parâmetros compartilhados com formato Revit.
@@ -47,26 +85,46 @@ def criar_arquivo_parametros_temporario(nome_script="PyRevit"):
     Example:
         >>> param_file = criar_arquivo_parametros_temporario("CoordenadasXYZ")
         >>> print(param_file)
-        'C:\\Users\\...\\Temp\\CoordRevit_CoordenadasXYZ_20251127143025.txt'
+        'C:\\Users\\...\\Temp\\CoordRevit_CoordenadasXYZ_k3j9x2a1.txt'
     """
-    temp_dir = tempfile.gettempdir()
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    nome_arquivo = "CoordRevit_{}_{}.txt".format(nome_script, timestamp)
-    param_file = os.path.join(temp_dir, nome_arquivo)
+    param_file = _caminho_temporario(nome_script)
 
     # Criar arquivo com cabeçalho padrão Revit
     with codecs.open(param_file, 'w', encoding='utf-8') as f:
-        f.write("# This is a Revit shared parameter file.\n")
-        f.write("# Do not edit manually when editing in Revit\n")
-        f.write("*META\tVERSION\tMINVERSION\n")
-        f.write("META\t2\t1\n")
-        f.write("*GROUP\tID\tNAME\n")
-        f.write("GROUP\t1\tParametros Customizados\n")
-        f.write("*PARAM\tGUID\tNAME\tDATATYPE\tDATACATEGORY\tGROUP\tVISIBLE\tDESCRIPTION\tUSERMODIFIABLE\n")
+        f.write(_CABECALHO)
 
     return param_file
 
 
+def _format_param_line(nome_param, tipo='TEXT', visivel=True, descricao='', modificavel=True):
+    """
+    Monta a linha PARAM do arquivo de parâmetros compartilhados (sem I/O).
+
+    Returns:
+        str: Linha "PARAM\t...\n"
+    """
+    # Gerar GUID único para o parâmetro
+    param_guid = str(uuid.uuid4())
+
+    # Determinar DATATYPE e DATACATEGORY baseado no tipo
+    datatype = _DATATYPE_MAP.get(tipo.upper(), 'TEXT')
+    datacategory = ''  # Vazio para parâmetros gerais
+
+    # Formatar linha de parâmetro
+    visivel_str = '1' if visivel else '0'
+    modificavel_str = '1' if modificavel else '0'
+
+    return _PARAM_LINE_TMPL % (
+        param_guid,
+        nome_param,
+        datatype,
+        datacategory,
+        visivel_str,
+        descricao,
+        modificavel_str
+    )
+
+
 def adicionar_parametro_ao_arquivo(arquivo_parametros, nome_param, tipo='TEXT', grupo='GENERAL',
                                    visivel=True, descricao='', modificavel=True):
     """
@@ -90,43 +148,7 @@ def adicionar_parametro_ao_arquivo(arquivo_parametros, nome_param, tipo='TEXT',
         >>> adicionar_parametro_ao_arquivo(arquivo, "Observacao", "TEXT", "DATA")
     """
     try:
-        # Gerar GUID único para o parâmetro
-        param_guid = str(uuid.uuid4())
-
-        # Mapear tipo e grupo (validação)
-        tipo_validado = tipo.upper()
-        grupo_validado = grupo.upper()
-
-        # Determinar DATATYPE e DATACATEGORY baseado no tipo
-        # Para Revit 2024+, usar nomes modernos
-        DATATYPE_MAP = {
-            'TEXT': 'TEXT',
-            'NUMBER': 'NUMBER',
-            'INTEGER': 'INTEGER',
-            'LENGTH': 'LENGTH',
-            'AREA': 'AREA',
-            'VOLUME': 'VOLUME',
-            'ANGLE': 'ANGLE',
-            'YESNO': 'YESNO',
-            'URL': 'URL',
-        }
-
-        datatype = DATATYPE_MAP.get(tipo_validado, 'TEXT')
-        datacategory = ''  # Vazio para parâmetros gerais
-
-        # Formatar linha de parâmetro
-        visivel_str = '1' if visivel else '0'
-        modificavel_str = '1' if modificavel else '0'
-
-        linha_param = "PARAM\t{}\t{}\t{}\t{}\t1\t{}\t{}\t{}\n".format(
-            param_guid,
-            nome_param,
-            datatype,
-            datacategory,
-            visivel_str,
-            descricao,
-            modificavel_str
-        )
+        linha_param = _format_param_line(nome_param, tipo, visivel, descricao, modificavel)
 
         # Adicionar ao arquivo
         with codecs.open(arquivo_parametros, 'a', encoding='utf-8') as f:
@@ -143,6 +165,9 @@ def adicionar_multiplos_parametros(arquivo_parametros, parametros_lista):
     """
     Adiciona múltiplos parâmetros de uma vez ao arquivo.
 
+    OTIMIZAÇÃO: Formata todas as linhas em memória e grava com uma única
+    abertura do arquivo (em vez de abrir/fechar por parâmetro).
+
     Args:
         arquivo_parametros (str): Caminho do arquivo de parâmetros
         parametros_lista (list): Lista de dicionários com definições de parâmetros
@@ -162,38 +187,59 @@ def adicionar_multiplos_parametros(arquivo_parametros, parametros_lista):
         >>> print("Adicionados: {}, Falhas: {}".format(sucesso, falha))
         Adicionados: 3, Falhas: 0
     """
-    sucesso = 0
+    linhas, falha = _formatar_parametros(parametros_lista)
+
+    if not linhas:
+        return (0, falha)
+
+    # Gravar todas as linhas com uma única abertura
+    try:
+        with codecs.open(arquivo_parametros, 'a', encoding='utf-8') as f:
+            f.writelines(linhas)
+    except Exception as e:
+        print("ERRO ao gravar parâmetros em '{}': {}".format(arquivo_parametros, str(e)))
+        return (0, falha + len(linhas))
+
+    return (len(linhas), falha)
+
+
+def _formatar_parametros(parametros_lista):
+    """Linhas PARAM de uma lista de definições.
+
+    Returns:
+        tuple: (list linhas, int falhas) - falhas = definições sem nome/inválidas
+    """
+    linhas = []
     falha = 0
 
     for param_def in parametros_lista:
         nome = param_def.get('nome', '')
-        tipo = param_def.get('tipo', 'TEXT')
-        grupo = param_def.get('grupo', 'GENERAL')
-        visivel = param_def.get('visivel', True)
-        descricao = param_def.get('descricao', '')
-        modificavel = param_def.get('modificavel', True)
 
         if not nome:
             print("AVISO: Parâmetro sem nome ignorado")
             falha += 1
             continue
 
-        resultado = adicionar_parametro_ao_arquivo(
-            arquivo_parametros, nome, tipo, grupo, visivel, descricao, modificavel
-        )
-
-        if resultado:
-            sucesso += 1
-        else:
+        try:
+            linhas.append(_format_param_line(
+                nome,
+                param_def.get('tipo', 'TEXT'),
+                param_def.get('visivel', True),
+                param_def.get('descricao', ''),
+                param_def.get('modificavel', True)
+            ))
+        except Exception as e:
+            print("ERRO ao adicionar parâmetro '{}': {}".format(nome, str(e)))
             falha += 1
 
-    return (sucesso, falha)
+    return linhas, falha
 
 
 def criar_arquivo_com_parametros(nome_script, parametros_lista):
     """
     Cria arquivo temporário e adiciona todos os parâmetros de uma vez.
-    Função de conveniência que combina criação + adição.
+    Função de conveniência que combina criação + adição: cabeçalho e
+    linhas PARAM são montados em memória e gravados numa única escrita.
 
     Args:
         nome_script (str): Nome do script
@@ -211,14 +257,15 @@ def criar_arquivo_com_parametros(nome_script, parametros_lista):
         >>> print("Arquivo criado: {}".format(arquivo))
     """
     try:
-        # Criar arquivo
-        arquivo = criar_arquivo_parametros_temporario(nome_script)
+        linhas, falha = _formatar_parametros(parametros_lista)
+        arquivo = _caminho_temporario(nome_script)
 
-        # Adicionar parâmetros
-        sucesso, falha = adicionar_multiplos_parametros(arquivo, parametros_lista)
+        # Criar arquivo com cabeçalho e parâmetros em uma única escrita
+        with codecs.open(arquivo, 'w', encoding='utf-8') as f:
+            f.write(_CABECALHO + "".join(linhas))
 
         print("Arquivo criado: {}".format(arquivo))
-        print("Parâmetros adicionados: {} | Falhas: {}".format(sucesso, falha))
+        print("Parâmetros adicionados: {} | Falhas: {}".format(len(linhas), falha))
 
         return arquivo
 
@@ -257,6 +304,15 @@ if __name__ == '__main__':
     print("4. Conteúdo do arquivo ({} caracteres)".format(len(conteudo)))
     assert 'Coord_X' in conteudo, "Parâmetro não encontrado no arquivo"
 
-    # Limpar arquivo de teste
+    # Teste 5: Criar arquivo com parâmetros em uma única escrita
+    arquivo_unico = criar_arquivo_com_parametros("TESTE_UNICO", params)
+    with codecs.open(arquivo_unico, 'r', encoding='utf-8') as f:
+        linhas_unico = f.read().splitlines()
+    print("5. Arquivo com parâmetros: {} linhas".format(len(linhas_unico)))
+    assert linhas_unico[0].startswith("# This is a Revit"), "Cabeçalho ausente"
+    assert sum(1 for l in linhas_unico if l.startswith("PARAM\t")) == 3, "Parâmetros ausentes"
+
+    # Limpar arquivos de teste
     os.remove(arquivo)
+    os.remove(arquivo_unico)
     print("\n✅ TODOS OS TESTES PASSARAM!")
@@ -30,16 +30,138 @@ USAGE:
 
 DEPENDENCIES:
     - Autodesk.Revit.DB (Document)
-    - os, shutil, datetime
+    - os, errno, time; shutil (importado só ao criar backup)
+    - System.IO (opcional, IronPython - cópia nativa)
 
 AUTHOR: Thiago Barreto
 VERSION: 1.0
 EXTRACTED FROM: ParameterPalette.pushbutton (DATFolderManager class)
 """
 
+import errno
 import os
-import shutil
-from datetime import datetime
+import time
+
+# IronPython: System.IO.File.Copy usa CopyFile nativo do Windows (cópia no
+# kernel), em vez do loop Python de 16KB do shutil.copy2 do Python 2.7.
+# CPython 3.8+ já usa cópia nativa no próprio shutil
+try:
+    from System.IO import File as _DotNetFile
+    DOTNET_IO_AVAILABLE = True
+except ImportError:
+    DOTNET_IO_AVAILABLE = False
+
+
+# Cache de (pasta, nome, central) por documento: (PathName, IsWorkshared)
+# -> tupla. PathName entra na chave para que "Salvar como" invalide
+_PROJECT_INFO_CACHE = {}
+
+_SEM_INFO = (None, "Sem_Nome", None)
+
+# Sufixos de caminho pré-calculados (separador fixo por SO) - evita
+# os.path.join a cada resolução
+_DAT_SUBDIR = os.sep + 'DAT'
+_BACKUP_SUBDIR = _DAT_SUBDIR + os.sep + 'backup'
+_TEMPLATES_NAME = os.sep + 'templates.csv'
+_DATA_CSV_SUFFIX = '_data.csv'
+
+
+def _sem_extensao(nome_arquivo):
+    """Nome sem extensão (como os.path.splitext(nome)[0] para nome sem pasta)."""
+    dot = nome_arquivo.rfind('.')
+    # Pontos iniciais (".rvt", "..x") fazem parte do nome, não da extensão
+    if dot > 0 and nome_arquivo[:dot].strip('.'):
+        return nome_arquivo[:dot]
+    return nome_arquivo
+
+
+def _compute_paths(doc, path_name, workshared):
+    """Calcula (pasta, nome, central) com uma leitura de cada propriedade."""
+    central = None
+    if workshared:
+        central_path = doc.GetWorksharingCentralModelPath()
+
+        # CentralServerPath: BIM 360, Revit Server (EAFP: uma leitura, não duas)
+        try:
+            central = central_path.CentralServerPath
+        except AttributeError:
+            central = None
+
+    # Workshared: pasta/nome do modelo central
+    if central:
+        folder, base = os.path.split(central)
+        return folder, _sem_extensao(base), central
+
+    # Local (ou central sem caminho): arquivo .rvt; pasta só para não-workshared
+    if path_name:
+        folder, base = os.path.split(path_name)
+        return (None if workshared else folder), _sem_extensao(base), central
+
+    return None, "Sem_Nome", central
+
+
+def _resolve_paths(doc):
+    """
+    Resolve (pasta do projeto, nome do projeto, caminho do central) de uma vez.
+
+    Returns:
+        tuple: (str or None, str, str or None) - ver get_project_folder,
+            get_project_name e get_central_path
+    """
+    try:
+        path_name = doc.PathName
+        workshared = doc.IsWorkshared
+    except Exception:
+        return _SEM_INFO
+
+    key = (path_name, workshared)
+    try:
+        return _PROJECT_INFO_CACHE[key]
+    except KeyError:
+        pass
+
+    try:
+        info = _compute_paths(doc, path_name, workshared)
+    except Exception:
+        return _SEM_INFO
+
+    _PROJECT_INFO_CACHE[key] = info
+    return info
+
+
+def clear_project_info_cache():
+    """Limpa caches de pasta/nome/central e de existência de pastas (ex: após mover o modelo central)."""
+    _PROJECT_INFO_CACHE.clear()
+    _EXIST_CACHE.clear()
+
+
+# Cache curto de pastas já garantidas por _ensure_dir: caminho -> (True, instante).
+# Paletas chamam get_dat_folder a cada clique; evita makedirs repetido
+_EXIST_CACHE = {}
+_EXIST_TTL = 2.0
+
+# IronPython 2.7 não tem time.monotonic
+_agora = getattr(time, 'monotonic', time.time)
+
+
+def _ensure_dir(path):
+    """Cria pasta (e pais) se não existir, sem stat prévio.
+
+    Raises:
+        OSError: Se não conseguir criar (exceto por já existir)
+    """
+    entry = _EXIST_CACHE.get(path)
+    if entry is not None and entry[0] and _agora() - entry[1] < _EXIST_TTL:
+        return
+
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        # Já existe: ok (Python 2.7 não tem exist_ok)
+        if e.errno != errno.EEXIST or not os.path.isdir(path):
+            raise
+
+    _EXIST_CACHE[path] = (True, _agora())
 
 
 def get_project_folder(doc):
@@ -60,25 +182,7 @@ def get_project_folder(doc):
         >>> if project_folder:
         ...     print("Projeto em: {}".format(project_folder))
     """
-    try:
-        # Projeto workshared - obter caminho do modelo central
-        if doc.IsWorkshared:
-            central_path = doc.GetWorksharingCentralModelPath()
-
-            # Tentar obter CentralServerPath (BIM 360, Revit Server)
-            if hasattr(central_path, 'CentralServerPath'):
-                model_path = central_path.CentralServerPath
-                if model_path:
-                    return os.path.dirname(model_path)
-
-        # Projeto local - obter caminho do arquivo
-        if not doc.IsWorkshared and doc.PathName:
-            return os.path.dirname(doc.PathName)
-
-        return None
-
-    except Exception as e:
-        return None
+    return _resolve_paths(doc)[0]
 
 
 def get_project_name(doc):
@@ -96,24 +200,7 @@ def get_project_name(doc):
         >>> print("Projeto: {}".format(project_name))
         Projeto: Edif_Residencial_Bloco_A
     """
-    try:
-        # Projeto workshared - obter nome do modelo central
-        if doc.IsWorkshared:
-            central_path = doc.GetWorksharingCentralModelPath()
-
-            if hasattr(central_path, 'CentralServerPath'):
-                model_path = central_path.CentralServerPath
-                if model_path:
-                    return os.path.splitext(os.path.basename(model_path))[0]
-
-        # Projeto local - obter nome do arquivo
-        if doc.PathName:
-            return os.path.splitext(os.path.basename(doc.PathName))[0]
-
-        return "Sem_Nome"
-
-    except:
-        return "Sem_Nome"
+    return _resolve_paths(doc)[1]
 
 
 def get_central_path(doc):
@@ -131,19 +218,7 @@ def get_central_path(doc):
         >>> if central:
         ...     print("Central: {}".format(central))
     """
-    try:
-        if not doc.IsWorkshared:
-            return None
-
-        central_path = doc.GetWorksharingCentralModelPath()
-
-        if hasattr(central_path, 'CentralServerPath'):
-            return central_path.CentralServerPath
-
-        return None
-
-    except:
-        return None
+    return _resolve_paths(doc)[2]
 
 
 def get_dat_folder(doc, subfolder=None, create=True):
@@ -172,17 +247,21 @@ def get_dat_folder(doc, subfolder=None, create=True):
     if not project_folder:
         return None
 
-    # Pasta DAT base
-    dat_folder = os.path.join(project_folder, 'DAT')
+    # Pasta DAT base (rstrip: raiz de unidade, ex: "C:\\", já termina em sep)
+    project_folder = project_folder.rstrip(os.sep)
+    if subfolder == 'backup':
+        dat_folder = project_folder + _BACKUP_SUBDIR
+    else:
+        dat_folder = project_folder + _DAT_SUBDIR
 
-    # Se solicitado subfolder, adicionar ao caminho
-    if subfolder:
-        dat_folder = os.path.join(dat_folder, subfolder)
+        # Se solicitado subfolder, adicionar ao caminho
+        if subfolder:
+            dat_folder = os.path.join(dat_folder, subfolder)
 
     # Criar pasta se não existir e create=True
-    if create and not os.path.exists(dat_folder):
+    if create:
         try:
-            os.makedirs(dat_folder)
+            _ensure_dir(dat_folder)
         except Exception as e:
             print("ERRO ao criar pasta DAT: {}".format(str(e)))
             return None
@@ -211,11 +290,50 @@ def get_backup_folder(doc, create=True):
     return get_dat_folder(doc, subfolder="backup", create=create)
 
 
+def _fast_copy(source_file, dest_file):
+    """Copia arquivo + metadados (como shutil.copy2), por cópia nativa se disponível."""
+    # Import tardio: só create_backup usa shutil; demais funções do módulo
+    # (chamadas no carregamento dos scripts) não pagam o import
+    import shutil
+
+    if DOTNET_IO_AVAILABLE:
+        try:
+            _DotNetFile.Copy(source_file, dest_file, True)
+            shutil.copystat(source_file, dest_file)
+            return
+        except Exception:
+            pass  # Fallback abaixo
+
+    shutil.copy2(source_file, dest_file)
+
+
+# Timestamp de backup formatado uma vez por segundo:
+# [epoch, "YYYYMMDD_HHMMSS", {(pasta, nome): backups neste segundo}]
+_BACKUP_TS = [None, None, {}]
+
+
+def _nome_backup(backup_folder, name_without_ext, ext):
+    """Nome [Nome]_[YYYYMMDD_HHMMSS][_N][.ext]; _N só para o 2º+ backup no mesmo segundo."""
+    epoch = int(time.time())
+    if epoch != _BACKUP_TS[0]:
+        _BACKUP_TS[:] = [epoch, time.strftime("%Y%m%d_%H%M%S", time.localtime(epoch)), {}]
+
+    seq = _BACKUP_TS[2]
+    key = (backup_folder, name_without_ext)
+    n = seq.get(key, 0)
+    seq[key] = n + 1
+
+    if n:
+        return "{}_{}_{}{}".format(name_without_ext, _BACKUP_TS[1], n, ext)
+    return "{}_{}{}".format(name_without_ext, _BACKUP_TS[1], ext)
+
+
 def create_backup(source_file, backup_folder=None, doc=None):
     """
     Cria backup de arquivo com timestamp.
 
     Formato do backup: [NomeOriginal]_[YYYYMMDD_HHMMSS][.ext]
+    (backups repetidos no mesmo segundo recebem sufixo _1, _2, ...)
 
     Args:
         source_file (str): Caminho do arquivo a fazer backup
@@ -240,10 +358,6 @@ def create_backup(source_file, backup_folder=None, doc=None):
         ...     print("Backup: {}".format(path))
     """
     try:
-        # Verificar se arquivo existe
-        if not os.path.exists(source_file):
-            return False, "Arquivo de origem não existe: {}".format(source_file)
-
         # Determinar pasta de backup
         if backup_folder is None:
             if doc is None:
@@ -255,18 +369,21 @@ def create_backup(source_file, backup_folder=None, doc=None):
                 return False, "Não foi possível determinar pasta de backup"
 
         # Criar pasta de backup se não existir
-        if not os.path.exists(backup_folder):
-            os.makedirs(backup_folder)
+        _ensure_dir(backup_folder)
 
         # Gerar nome do backup com timestamp
         base_name = os.path.basename(source_file)
         name_without_ext, ext = os.path.splitext(base_name)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = "{}_{}{}".format(name_without_ext, timestamp, ext)
+        backup_name = _nome_backup(backup_folder, name_without_ext, ext)
         backup_path = os.path.join(backup_folder, backup_name)
 
-        # Copiar arquivo
-        shutil.copy2(source_file, backup_path)
+        # Copiar arquivo (sem stat prévio da origem: a cópia já falha se não existir)
+        try:
+            _fast_copy(source_file, backup_path)
+        except (IOError, OSError) as e:
+            if e.errno == errno.ENOENT and not os.path.exists(source_file):
+                return False, "Arquivo de origem não existe: {}".format(source_file)
+            raise
 
         return True, backup_path
 
@@ -296,7 +413,7 @@ def get_project_data_csv_path(doc, create_dat_folder=True):
     if not dat_folder:
         return None
 
-    csv_path = os.path.join(dat_folder, "{}_data.csv".format(project_name))
+    csv_path = dat_folder + os.sep + project_name + _DATA_CSV_SUFFIX
 
     return csv_path
 
@@ -322,7 +439,7 @@ def get_templates_csv_path(doc, create_dat_folder=True):
     if not dat_folder:
         return None
 
-    return os.path.join(dat_folder, 'templates.csv')
+    return dat_folder + _TEMPLATES_NAME
 
 
 def find_data_csv(doc, script_path=None, fallback_names=None):
@@ -347,23 +464,18 @@ def find_data_csv(doc, script_path=None, fallback_names=None):
         >>> if csv_path:
         ...     print("CSV encontrado em {}: {}".format(source, csv_path))
     """
-    # 1. Tentar DAT do projeto
-    dat_csv = get_project_data_csv_path(doc, create_dat_folder=False)
-    if dat_csv and os.path.exists(dat_csv):
-        return dat_csv, "DAT"
+    # Candidatos em ordem de prioridade; existência sem cache (CSV pode ser
+    # criado entre duas buscas)
+    candidates = [(get_project_data_csv_path(doc, create_dat_folder=False), "DAT")]
 
-    # 2. Tentar data.csv na pasta do script
     if script_path:
-        script_csv = os.path.join(script_path, 'data.csv')
-        if os.path.exists(script_csv):
-            return script_csv, "script"
+        candidates.append((os.path.join(script_path, 'data.csv'), "script"))
+        for fallback_name in fallback_names or ():
+            candidates.append((os.path.join(script_path, fallback_name), "fallback"))
 
-    # 3. Tentar fallbacks adicionais
-    if fallback_names and script_path:
-        for fallback_name in fallback_names:
-            fallback_path = os.path.join(script_path, fallback_name)
-            if os.path.exists(fallback_path):
-                return fallback_path, "fallback"
+    for csv_path, source in candidates:
+        if csv_path and os.path.exists(csv_path):
+            return csv_path, source
 
     return None, None
 
@@ -398,6 +510,22 @@ if __name__ == '__main__':
         assert os.path.exists(result), "Arquivo de backup deveria existir"
         print("   ✅ Backup criado com sucesso")
 
+    # Teste 7: sufixos pré-calculados == os.path.join
+    print("\n7. Testando caminhos DAT (documento simulado)...")
+
+    class _DocSimulado(object):
+        PathName = os.path.join(tempfile.gettempdir(), "Proj_Teste.rvt")
+        IsWorkshared = False
+
+    doc_teste = _DocSimulado()
+    pasta = os.path.dirname(_DocSimulado.PathName)
+    assert get_dat_folder(doc_teste, create=False) == os.path.join(pasta, 'DAT')
+    assert get_backup_folder(doc_teste, create=False) == os.path.join(pasta, 'DAT', 'backup')
+    assert get_dat_folder(doc_teste, subfolder='x', create=False) == os.path.join(pasta, 'DAT', 'x')
+    assert get_templates_csv_path(doc_teste, False) == os.path.join(pasta, 'DAT', 'templates.csv')
+    assert get_project_data_csv_path(doc_teste, False) == os.path.join(pasta, 'DAT', 'Proj_Teste_data.csv')
+    print("   ✅ Caminhos equivalentes a os.path.join")
+
     # Cleanup
     os.unlink(test_file.name)
     if success and os.path.exists(result):
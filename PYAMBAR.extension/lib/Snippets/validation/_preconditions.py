@@ -36,7 +36,44 @@ VERSION: 1.0
 EXTRACTED FROM: ParameterPalette.pushbutton
 """
 
-from Autodesk.Revit.DB import FilteredWorksetCollector, WorksetKind, Transaction
+from collections import namedtuple
+
+from Autodesk.Revit.DB import FilteredWorksetCollector, WorksetKind
+
+
+_ERR_SEM_DOCUMENTO = "❌ Nenhum documento ativo"
+_ERR_SOMENTE_LEITURA = "❌ Documento em modo somente leitura"
+_ERR_SEM_VISTA = "❌ Nenhuma vista ativa no documento"
+
+# Mensagens de validate_selection (a de sucesso roda a cada validação)
+_SEL_OK_FMT = "✅ %d elemento(s) selecionado(s)"
+_SEL_OK_1 = _SEL_OK_FMT % 1
+_SEL_VAZIA = "❌ Nenhum elemento selecionado"
+_SEL_INSUFICIENTE_FMT = "❌ Seleção insuficiente: %d elemento(s) requerido(s), %d selecionado(s)"
+_SEL_EXCEDE_FMT = "❌ Seleção excede limite: máximo %d elemento(s), %d selecionado(s)"
+
+# Propriedades do documento lidas uma única vez em validate_all_preconditions
+_DocSnapshot = namedtuple('_DocSnapshot', 'is_null is_readonly has_active_view is_workshared')
+
+
+def _snapshot(doc):
+    """Lê IsReadOnly/ActiveView/IsWorkshared de uma vez (validação em Python)."""
+    if not doc:
+        return _DocSnapshot(True, False, False, False)
+    return _DocSnapshot(False, doc.IsReadOnly, bool(doc.ActiveView), doc.IsWorkshared)
+
+
+def _document_errors(snapshot):
+    """Erros de validate_document a partir do snapshot."""
+    if snapshot.is_null:
+        return [_ERR_SEM_DOCUMENTO]
+
+    errors = []
+    if snapshot.is_readonly:
+        errors.append(_ERR_SOMENTE_LEITURA)
+    if not snapshot.has_active_view:
+        errors.append(_ERR_SEM_VISTA)
+    return errors
 
 
 def validate_document(doc):
@@ -63,26 +100,9 @@ def validate_document(doc):
         ...         print(error)
         ...     return
     """
-    errors = []
-
-    # Verificar existência do documento
-    if not doc:
-        errors.append("❌ Nenhum documento ativo")
-        return False, errors
-
-    # Verificar modo leitura
-    if doc.IsReadOnly:
-        errors.append("❌ Documento em modo somente leitura")
-
-    # Verificar vista ativa
-    if not doc.ActiveView:
-        errors.append("❌ Nenhuma vista ativa no documento")
-
-    # Retornar resultado
-    if errors:
-        return False, errors
-
-    return True, []
+    # Mesmas regras de validate_all_preconditions (um único _document_errors)
+    errors = _document_errors(_snapshot(doc))
+    return not errors, errors
 
 
 def validate_worksets(doc, check_editable=True):
@@ -103,27 +123,29 @@ def validate_worksets(doc, check_editable=True):
         >>> if not valid:
         ...     print("Worksets bloqueados: {}".format(", ".join(locked)))
     """
-    locked_worksets = []
+    # Nada a verificar: não coletar worksets
+    if not check_editable:
+        return True, []
 
     # Se não for workshared, não há worksets para validar
     if not doc.IsWorkshared:
-        return True, locked_worksets
+        return True, []
 
-    try:
-        # Coletar worksets de usuário
-        collector = FilteredWorksetCollector(doc)
-        worksets = collector.OfKind(WorksetKind.UserWorkset).ToWorksets()
+    return _locked_worksets(doc, check_editable)
 
-        if check_editable:
-            # Identificar worksets bloqueados (não editáveis)
-            for workset in worksets:
-                if not workset.IsEditable:
-                    locked_worksets.append(workset.Name)
 
-        # Válido se não houver worksets bloqueados
-        valid = len(locked_worksets) == 0
+def _locked_worksets(doc, check_editable):
+    """validate_worksets para documento já sabidamente workshared."""
+    if not check_editable:
+        return True, []
 
-        return valid, locked_worksets
+    try:
+        # Iterar o coletor direto (sem ToWorksets); Name só dos bloqueados
+        collector = FilteredWorksetCollector(doc).OfKind(WorksetKind.UserWorkset)
+        locked_worksets = [workset.Name for workset in collector if not workset.IsEditable]
+
+        # Válido se não houver worksets bloqueados
+        return not locked_worksets, locked_worksets
 
     except Exception as e:
         # Se houver erro ao acessar worksets, considerar válido mas retornar erro
@@ -157,28 +179,25 @@ def validate_selection(uidoc, min_count=1, max_count=None):
 
     try:
         selection_ids = uidoc.Selection.GetElementIds()
-        count = selection_ids.Count if hasattr(selection_ids, 'Count') else len(selection_ids)
+        # ICollection<ElementId>: .Count sempre existe
+        count = selection_ids.Count
 
         # Verificar mínimo
         if count < min_count:
             if min_count == 1:
-                message = "❌ Nenhum elemento selecionado"
+                message = _SEL_VAZIA
             else:
-                message = "❌ Seleção insuficiente: {} elemento(s) requerido(s), {} selecionado(s)".format(
-                    min_count, count
-                )
+                message = _SEL_INSUFICIENTE_FMT % (min_count, count)
             return False, count, message
 
         # Verificar máximo
         if max_count is not None and count > max_count:
-            message = "❌ Seleção excede limite: máximo {} elemento(s), {} selecionado(s)".format(
-                max_count, count
-            )
-            return False, count, message
+            return False, count, _SEL_EXCEDE_FMT % (max_count, count)
 
-        # Seleção válida
-        message = "✅ {} elemento(s) selecionado(s)".format(count)
-        return True, count, message
+        # Seleção válida (caso mais comum, 1 elemento, sem formatação)
+        if count == 1:
+            return True, 1, _SEL_OK_1
+        return True, count, _SEL_OK_FMT % count
 
     except Exception as e:
         return False, 0, "❌ Erro ao verificar seleção: {}".format(str(e))
@@ -208,15 +227,9 @@ def validate_transaction_possible(doc):
     if doc.IsReadOnly:
         return False, "Documento em modo somente leitura"
 
-    # Verificar se já existe transação ativa
-    try:
-        # Tentar criar transação de teste (não inicia)
-        test_transaction = Transaction(doc, "Test")
-        # Se conseguiu criar, transação é possível
-        return True, ""
-
-    except Exception as e:
-        return False, "Erro ao verificar possibilidade de transação: {}".format(str(e))
+    # Documento existe e aceita escrita: basta isso (criar uma Transaction
+    # de teste sem Start() não verificava nada além disso)
+    return True, ""
 
 
 def validate_all_preconditions(doc, uidoc, min_selection=None, check_worksets=True):
@@ -241,16 +254,15 @@ def validate_all_preconditions(doc, uidoc, min_selection=None, check_worksets=Tr
         ...         output.print_md(error)
         ...     return
     """
-    all_errors = []
+    # Propriedades do documento lidas uma vez, validadas em Python
+    snapshot = _snapshot(doc)
 
     # Validar documento
-    doc_valid, doc_errors = validate_document(doc)
-    if not doc_valid:
-        all_errors.extend(doc_errors)
+    all_errors = _document_errors(snapshot)
 
-    # Validar worksets
-    if check_worksets:
-        ws_valid, locked_worksets = validate_worksets(doc, check_editable=True)
+    # Validar worksets (sem documento não há o que verificar)
+    if check_worksets and snapshot.is_workshared:
+        ws_valid, locked_worksets = _locked_worksets(doc, check_editable=True)
         if not ws_valid and locked_worksets:
             all_errors.append("⚠️ {} workset(s) bloqueado(s): {}".format(
                 len(locked_worksets), ", ".join(locked_worksets)
@@ -16,8 +16,10 @@ Uso:
 Author: Thiago Barreto Sobral Nunes
 Version: 1.0.0
 """
+import re
+
 try:
-    from pydantic import BaseModel, Field, field_validator, model_validator
+    from pydantic import BaseModel, Field, PrivateAttr, field_validator, model_validator
     from typing import List, Optional, Dict, Any
     PYDANTIC_AVAILABLE = True
 except ImportError:
@@ -25,6 +27,15 @@ except ImportError:
     BaseModel = object
 
 
+# Compilado uma vez; usado por ColorScheme.validate_hex_color
+_HEX6 = re.compile(r'[0-9A-Fa-f]{6}\Z')
+
+# Tipos aceitos por ParameterConfig.storage_type (mensagem montada uma vez)
+_STORAGE_TYPES_ORDER = ('Text', 'Integer', 'Double', 'ElementId')
+_VALID_STORAGE_TYPES = frozenset(_STORAGE_TYPES_ORDER)
+_STORAGE_TYPE_ERROR = 'Tipo inválido. Deve ser um de: {}'.format(", ".join(_STORAGE_TYPES_ORDER))
+
+
 # ============================================================================
 # PARAMETER MODELS
 # ============================================================================
@@ -57,10 +68,8 @@ if PYDANTIC_AVAILABLE:
         @field_validator('storage_type')
         @classmethod
         def valid_storage_type(cls, v):
-            if v is not None:
-                valid_types = ['Text', 'Integer', 'Double', 'ElementId']
-                if v not in valid_types:
-                    raise ValueError('Tipo inválido. Deve ser um de: {}'.format(", ".join(valid_types)))
+            if v is not None and v not in _VALID_STORAGE_TYPES:
+                raise ValueError(_STORAGE_TYPE_ERROR)
             return v
 
         class Config:
@@ -82,9 +91,12 @@ if PYDANTIC_AVAILABLE:
         @field_validator('parameters')
         @classmethod
         def no_duplicate_names(cls, v):
-            names = [p.name for p in v]
-            if len(names) != len(set(names)):
-                raise ValueError('Nomes de parâmetros duplicados encontrados')
+            seen = set()
+            for p in v:
+                name = p.name
+                if name in seen:
+                    raise ValueError('Nomes de parâmetros duplicados: {}'.format(name))
+                seen.add(name)
             return v
 
 
@@ -104,18 +116,22 @@ if PYDANTIC_AVAILABLE:
             parameter_value: Valor do parâmetro associado
         """
         name: str = Field(..., min_length=1, description="Nome do esquema")
-        rgb: str = Field(..., pattern=r'^#[0-9A-Fa-f]{6}$', description="Cor RGB hex")
+        rgb: str = Field(..., description="Cor RGB hex (#RRGGBB)")
         categories: List[str] = Field(default_factory=list, description="Categorias")
         parameter_value: Optional[str] = Field(default=None, description="Valor do parâmetro")
 
+        # (rgb, (R, G, B)) da última conversão - invalidado se rgb mudar
+        _revit_color: Optional[tuple] = PrivateAttr(default=None)
+
         @field_validator('rgb')
         @classmethod
         def validate_hex_color(cls, v):
-            if not v.startswith('#'):
-                v = '#' + v
-            if len(v) != 7:
+            # Validação única (sem pattern= no Field): '#' opcional
+            if v.startswith('#'):
+                v = v[1:]
+            if len(v) != 6 or not _HEX6.match(v):
                 raise ValueError('RGB deve estar no formato #RRGGBB')
-            return v.upper()
+            return '#' + v.upper()
 
         def to_revit_color(self):
             """
@@ -124,8 +140,14 @@ if PYDANTIC_AVAILABLE:
             Returns:
                 tuple: (R, G, B) valores 0-255
             """
-            hex_color = self.rgb.lstrip('#')
-            return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+            cached = self._revit_color
+            if cached is not None and cached[0] == self.rgb:
+                return cached[1]
+
+            # Uma conversão em C em vez de 3 fatias + int(..., 16)
+            r, g, b = bytearray.fromhex(self.rgb[1:])
+            self._revit_color = (self.rgb, (r, g, b))
+            return r, g, b
 
 
     class ColorSchemeCollection(BaseModel):
@@ -177,10 +199,101 @@ if PYDANTIC_AVAILABLE:
             return v.strip()
 
 
+# ============================================================================
+# FALLBACK SEM PYDANTIC (IronPython)
+# ============================================================================
+
+if not PYDANTIC_AVAILABLE:
+    import copy
+
+    class _ModeloSimples(object):
+        """
+        Substituto mínimo de BaseModel: guarda os campos como atributos.
+
+        Mesma superfície usada pelos chamadores (atributos, model_dump,
+        model_copy), só com as validações básicas de cada modelo.
+        """
+        _defaults = {}
+
+        def __init__(self, **data):
+            values = copy.deepcopy(self._defaults)
+            values.update(data)
+            self.__dict__.update(values)
+
+        def model_dump(self):
+            return dict(self.__dict__)
+
+        def model_copy(self, deep=False):
+            data = copy.deepcopy(self.__dict__) if deep else self.__dict__
+            return self.__class__(**data)
+
+        def __repr__(self):
+            return "{}({})".format(type(self).__name__, self.__dict__)
+
+
+    class ParameterConfig(_ModeloSimples):
+        """Configuração de parâmetro (sem pydantic) - ver versão pydantic."""
+        _defaults = {'is_enabled': True, 'group': None, 'is_shared': False, 'storage_type': None}
+
+        def __init__(self, **data):
+            name = data.get('name')
+            if not name or not name.strip():
+                raise ValueError('Nome do parâmetro é obrigatório')
+            _ModeloSimples.__init__(self, **data)
+
+
+    class ColorScheme(_ModeloSimples):
+        """Esquema de cores (sem pydantic) - ver versão pydantic."""
+        _defaults = {'categories': [], 'parameter_value': None}
+
+        def __init__(self, **data):
+            if not data.get('name'):
+                raise ValueError('Nome é obrigatório')
+            if not data.get('rgb'):
+                raise ValueError('Cor RGB é obrigatória')
+            _ModeloSimples.__init__(self, **data)
+
+        def to_revit_color(self):
+            """Converte RGB hex para tupla (R, G, B) 0-255."""
+            r, g, b = bytearray.fromhex(self.rgb.lstrip('#'))
+            return r, g, b
+
+
+    class SheetConfig(_ModeloSimples):
+        """Configuração de folha (sem pydantic) - ver versão pydantic."""
+        _defaults = {'discipline': None, 'appears_in_sheet_list': True}
+
+
 # ============================================================================
 # VALIDATION HELPERS
 # ============================================================================
 
+if PYDANTIC_AVAILABLE:
+    from functools import lru_cache
+
+    # CSVs de configuração repetem poucos dicts distintos (ex: paleta de ~10
+    # cores em milhares de linhas): validar cada dict distinto uma vez
+    @lru_cache(maxsize=256)
+    def _parameter_config_cached(items):
+        return ParameterConfig(**dict(items))
+
+    @lru_cache(maxsize=256)
+    def _color_scheme_cached(items):
+        return ColorScheme(**dict(items))
+
+
+def _cache_key(data):
+    """Chave hashable de um dict de configuração (listas viram tuplas), ou None."""
+    try:
+        key = tuple(sorted(
+            (k, tuple(v) if isinstance(v, list) else v) for k, v in data.items()
+        ))
+        hash(key)
+        return key
+    except TypeError:
+        return None
+
+
 def validate_parameter_config(data):
     """
     Valida dados de configuração de parâmetro.
@@ -189,18 +302,19 @@ def validate_parameter_config(data):
         data (dict): Dicionário com dados do parâmetro
 
     Returns:
-        ParameterConfig or dict: Modelo validado ou dict original se pydantic não disponível
+        ParameterConfig: Modelo validado (modelo simples se pydantic não disponível)
 
     Raises:
         ValueError: Se dados inválidos
     """
-    if not PYDANTIC_AVAILABLE:
-        # Validação básica sem pydantic
-        if not data.get('name') or not data.get('name').strip():
-            raise ValueError('Nome do parâmetro é obrigatório')
-        return data
+    # Sem pydantic: modelo simples já é barato e a chave trocaria listas
+    # por tuplas
+    key = _cache_key(data) if PYDANTIC_AVAILABLE else None
+    if key is None:
+        return ParameterConfig(**data)
 
-    return ParameterConfig(**data)
+    # Cópia: validate_assignment permite alterar a instância devolvida
+    return _parameter_config_cached(key).model_copy()
 
 
 def validate_color_scheme(data):
@@ -211,20 +325,17 @@ def validate_color_scheme(data):
         data (dict): Dicionário com dados do esquema
 
     Returns:
-        ColorScheme or dict: Modelo validado ou dict original
+        ColorScheme: Modelo validado (modelo simples se pydantic não disponível)
 
     Raises:
         ValueError: Se dados inválidos
     """
-    if not PYDANTIC_AVAILABLE:
-        # Validação básica
-        if not data.get('name'):
-            raise ValueError('Nome é obrigatório')
-        if not data.get('rgb'):
-            raise ValueError('Cor RGB é obrigatória')
-        return data
-
-    return ColorScheme(**data)
+    key = _cache_key(data) if PYDANTIC_AVAILABLE else None
+    if key is None:
+        return ColorScheme(**data)
+
+    # Cópia profunda: categories é lista mutável
+    return _color_scheme_cached(key).model_copy(deep=True)
 
 
 def validate_json_config(json_data, model_class):
@@ -17,13 +17,35 @@ USAGE:
 DEPENDENCIES:
     - Autodesk.Revit.DB
     - Snippets.core._transaction (ef_Transaction)
+    - Snippets._revit_api_compat (create_string_filter_rule)
 
 AUTHOR: Thiago Barreto
 VERSION: 1.0
 """
 
+from collections import OrderedDict
+
 from Autodesk.Revit.DB import *
 from Snippets._transaction import ef_Transaction
+from Snippets._revit_api_compat import create_string_filter_rule
+
+
+# (hash do documento, nome) -> ElementId do schedule; validado a cada uso
+# (GetElement + Name), então renomear/excluir fora deste módulo é seguro
+_SCHEDULE_CACHE = OrderedDict()
+_SCHEDULE_CACHE_MAX = 128
+
+
+def _cache_schedule(doc, nome_schedule, schedule):
+    """Guarda o Id do schedule no cache (descarta o mais antigo se cheio)."""
+    if len(_SCHEDULE_CACHE) >= _SCHEDULE_CACHE_MAX:
+        _SCHEDULE_CACHE.popitem(last=False)
+    _SCHEDULE_CACHE[(hash(doc), nome_schedule)] = schedule.Id
+
+
+def clear_schedule_cache():
+    """Limpa o cache de schedules por nome."""
+    _SCHEDULE_CACHE.clear()
 
 
 def buscar_schedule_por_nome(doc, nome_schedule):
@@ -44,15 +66,35 @@ def buscar_schedule_por_nome(doc, nome_schedule):
         ... else:
         ...     print("Schedule não existe")
     """
+    # Cache: um GetElement em vez de coletar schedules
+    key = (hash(doc), nome_schedule)
+    schedule_id = _SCHEDULE_CACHE.get(key)
+    if schedule_id is not None:
+        schedule = doc.GetElement(schedule_id)
+        if schedule is not None and schedule.Name == nome_schedule:
+            return schedule
+        del _SCHEDULE_CACHE[key]
+
     collector = FilteredElementCollector(doc).OfClass(ViewSchedule)
 
+    # Filtro nativo por VIEW_NAME: Revit filtra no C++, Python só vê os
+    # candidatos (regra pode ignorar maiúsculas; conferência exata abaixo)
+    collector = collector.WherePasses(_filtro_nome_vista(nome_schedule))
+
     for schedule in collector:
         if schedule.Name == nome_schedule:
+            _cache_schedule(doc, nome_schedule, schedule)
             return schedule
 
     return None
 
 
+def _filtro_nome_vista(nome):
+    """ElementParameterFilter VIEW_NAME == nome."""
+    param_id = ElementId(BuiltInParameter.VIEW_NAME)
+    return ElementParameterFilter(create_string_filter_rule(param_id, nome))
+
+
 def buscar_schedules_por_categoria(doc, categoria):
     """
     Busca todos os schedules de uma categoria específica.
@@ -107,6 +149,7 @@ def criar_schedule_basico(doc, nome_schedule, categoria, nome_template=None):
 
         # Renomear
         schedule.Name = nome_schedule
+        _cache_schedule(doc, nome_schedule, schedule)
 
         # Aplicar template se fornecido
         if nome_template:
@@ -174,6 +217,46 @@ def adicionar_campo_schedule(schedule, nome_parametro, campo_cabecalho=None):
         return None
 
 
+def _mapa_campos(schedule):
+    """Nome -> SchedulableField (com parâmetro válido), lido uma vez por schedule."""
+    doc = schedule.Document
+    invalid_id = ElementId.InvalidElementId
+    mapa = {}
+
+    for field in schedule.Definition.GetSchedulableFields():
+        # Comparar nome do parâmetro
+        param_id = field.ParameterId
+        if param_id and param_id != invalid_id:
+            # Para parâmetros Built-in, comparar pelo nome (primeiro vence)
+            nome = field.GetName(doc)
+            if nome not in mapa:
+                mapa[nome] = field
+
+    return mapa
+
+
+def _adicionar_campo_do_mapa(schedule, mapa_campos, nome_parametro, campo_cabecalho=None):
+    """adicionar_campo_schedule com campos já resolvidos por _mapa_campos."""
+    campo_encontrado = mapa_campos.get(nome_parametro)
+    if not campo_encontrado:
+        print("ERRO: Parâmetro '{}' não encontrado nos campos disponíveis".format(nome_parametro))
+        return None
+
+    try:
+        # Adicionar campo ao schedule
+        schedule_field = schedule.Definition.AddField(campo_encontrado)
+
+        # Customizar cabeçalho se fornecido
+        if campo_cabecalho:
+            schedule_field.ColumnHeading = campo_cabecalho
+
+        return schedule_field
+
+    except Exception as e:
+        print("ERRO ao adicionar campo '{}': {}".format(nome_parametro, str(e)))
+        return None
+
+
 def criar_schedule_com_campos(doc, nome_schedule, categoria, lista_parametros, nome_template=None):
     """
     Cria schedule completo com múltiplos campos de uma vez.
@@ -203,10 +286,11 @@ def criar_schedule_com_campos(doc, nome_schedule, categoria, lista_parametros, n
         if not schedule:
             return None
 
-        # Adicionar campos
+        # Adicionar campos (campos disponíveis resolvidos uma única vez)
+        mapa_campos = _mapa_campos(schedule)
         campos_adicionados = 0
         for param_nome in lista_parametros:
-            campo = adicionar_campo_schedule(schedule, param_nome)
+            campo = _adicionar_campo_do_mapa(schedule, mapa_campos, param_nome)
             if campo:
                 campos_adicionados += 1
 
@@ -246,6 +330,7 @@ def deletar_schedule_por_nome(doc, nome_schedule):
             return False
 
         doc.Delete(schedule.Id)
+        _SCHEDULE_CACHE.pop((hash(doc), nome_schedule), None)
         print("Schedule '{}' deletado".format(nome_schedule))
         return True
 
@@ -272,37 +357,63 @@ def obter_dados_schedule(schedule):
         ...         linha['Comentario'], linha['Coord_X'], linha['Coord_Y'], linha['Coord_Z']
         ...     ))
     """
-    dados = []
-
     try:
-        table_data = schedule.GetTableData()
-        section_data = table_data.GetSectionData(SectionType.Body)
+        nomes_colunas = obter_colunas_schedule(schedule)
 
-        num_rows = section_data.NumberOfRows
-        num_cols = section_data.NumberOfColumns
+        # Linhas lidas como tuplas; dict só na saída (mesma API de antes)
+        return [dict(zip(nomes_colunas, linha)) for linha in iter_dados_schedule(schedule)]
 
-        # Obter nomes das colunas (primeira linha)
-        nomes_colunas = []
-        for col_idx in range(num_cols):
-            header_text = schedule.GetCellText(SectionType.Header, 0, col_idx)
-            nomes_colunas.append(header_text)
+    except Exception as e:
+        print("ERRO ao ler dados do schedule: {}".format(str(e)))
+        return []
 
-        # Ler dados (pular linha de cabeçalho)
-        for row_idx in range(1, num_rows):
-            linha_dict = {}
 
-            for col_idx in range(num_cols):
-                nome_col = nomes_colunas[col_idx]
-                valor = schedule.GetCellText(SectionType.Body, row_idx, col_idx)
-                linha_dict[nome_col] = valor
+def obter_colunas_schedule(schedule):
+    """
+    Nomes das colunas de um schedule (primeira linha do cabeçalho).
 
-            dados.append(linha_dict)
+    Args:
+        schedule (ViewSchedule): Schedule a ler
 
-        return dados
+    Returns:
+        tuple: Nomes das colunas, na ordem das colunas
+    """
+    section_data = schedule.GetTableData().GetSectionData(SectionType.Body)
+    return tuple(
+        schedule.GetCellText(SectionType.Header, 0, col_idx)
+        for col_idx in range(section_data.NumberOfColumns)
+    )
 
-    except Exception as e:
-        print("ERRO ao ler dados do schedule: {}".format(str(e)))
-        return []
+
+def iter_dados_schedule(schedule):
+    """
+    Gera as linhas de dados de um schedule como tuplas, sob demanda.
+
+    Sem dict por linha e sem lista completa em memória: para schedules
+    grandes ou quando o chamador pode parar antes do fim.
+
+    Args:
+        schedule (ViewSchedule): Schedule a ler
+
+    Yields:
+        tuple: Valores (texto) da linha, na ordem de obter_colunas_schedule()
+
+    Example:
+        >>> colunas = obter_colunas_schedule(schedule)
+        >>> for linha in iter_dados_schedule(schedule):
+        ...     if linha[0] == "P-01":
+        ...         break
+    """
+    section_data = schedule.GetTableData().GetSectionData(SectionType.Body)
+
+    # ViewSchedule.GetCellText: texto exibido (campos calculados/formatados)
+    get_cell_text = schedule.GetCellText
+    body = SectionType.Body
+    colunas = range(section_data.NumberOfColumns)
+
+    # Ler dados (pular linha de cabeçalho)
+    for row_idx in range(1, section_data.NumberOfRows):
+        yield tuple([get_cell_text(body, row_idx, col_idx) for col_idx in colunas])
 
 
 def aplicar_filtros_schedule(schedule, filtros_lista):
@@ -371,6 +482,7 @@ if __name__ == '__main__':
     print("3. adicionar_campo_schedule() - OK (requer doc + transação)")
     print("4. criar_schedule_com_campos() - OK (requer doc + transação)")
     print("5. obter_dados_schedule() - OK (requer schedule existente)")
+    print("6. iter_dados_schedule() - OK (requer schedule existente)")
 
     print("\n✅ ESTRUTURA DE FUNÇÕES VALIDADA!")
     print("Execute testes em ambiente Revit para validação completa")